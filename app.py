@@ -1,11 +1,34 @@
 
 
 import streamlit as st
-import tensorflow as tf
-from PIL import Image
 import numpy as np
 import os
-import keras
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# TensorFlow is imported lazily by the background model loader so the page renders right away
+from inference import MODEL_PATH, BackgroundModelLoader
+from preprocessing import IMG_SIZE, decode_image, preprocess_image
+from serve import predict_remote, remote_model_fingerprint
+from prediction_cache import PredictionCache, file_fingerprint
+from metrics import METRICS, start_exporters
+
+# Set to the URL of a running `serve.py` to use it as the inference backend
+INFERENCE_URL = os.environ.get("DINO_INFERENCE_URL")
+# How often to re-ask the server which model it serves (bounds stale cached scores after a redeploy)
+REMOTE_FINGERPRINT_TTL_SECONDS = 30
+
+# Largest side of the preview kept in session state (the column is ~350px wide)
+THUMBNAIL_SIZE = (512, 512)
+
+# Classroom mode: many uploads, decoded in parallel and classified in batched forward passes
+SINGLE_MODE = "📸 One photo"
+CLASSROOM_MODE = "🏫 Many photos (classroom mode)"
+CLASSROOM_BATCH_SIZE = 16
+CLASSROOM_DECODE_WORKERS = min(8, os.cpu_count() or 1)
+GRID_COLUMNS = 4
+GRID_THUMBNAIL_SIZE = (256, 256)
 
 # -------------------------------------------------------------
 # Page Configuration
@@ -16,9 +39,6 @@ st.set_page_config(
     layout="centered"
 )
 
-st.write("TensorFlow version:", tf.__version__)
-st.write("Keras version:", keras.__version__)
-
 # -------------------------------------------------------------
 # Custom CSS Styling
 # -------------------------------------------------------------
@@ -50,32 +70,72 @@ st.markdown("""
 # -------------------------------------------------------------
 @st.cache_resource
 def load_model():
-    """Load the trained Keras 3 model (.keras format)."""
-    model_path = 'models/dinosaur_classifier.keras'
+    """Start loading + warming the trained Keras 3 model (.keras format) in the background."""
+    model_path = MODEL_PATH
 
     if not os.path.exists(model_path):
         st.error(f"❌ Model not found at {model_path}")
         st.info("Please ensure 'dinosaur_classifier.keras' is in the 'models/' folder.")
         st.stop()
 
+    loader = BackgroundModelLoader(model_path)
+    METRICS.register_collector(lambda: {
+        'model_load_seconds': loader.load_seconds,
+        'model_warmup_seconds': loader.warmup_seconds,
+        'time_to_first_prediction_seconds': loader.first_prediction_seconds,
+    })
+    return loader
+
+def wait_for_model(loader):
+    """Block until the background loader has a warmed-up inference engine."""
     try:
-        # 🧠 Keras 3 fix → disable safety checks for custom / legacy layers
-        model = tf.keras.models.load_model(model_path, compile=False, safe_mode=False)
-        return model
+        with st.spinner("🔄 Loading AI model..."):
+            return loader.result()
     except Exception as e:
+        # Forget the failed loader so the next rerun tries again instead of reusing the cached error
+        load_model.clear()
         st.error(f"❌ Error loading model: {e}")
         st.stop()
 
+@st.cache_resource
+def local_model_fingerprint():
+    """Fingerprint of the local model file, hashed once (the loaded model is never reloaded either)."""
+    return file_fingerprint(MODEL_PATH) if os.path.exists(MODEL_PATH) else MODEL_PATH
+
+@st.cache_data(ttl=REMOTE_FINGERPRINT_TTL_SECONDS, show_spinner=False)
+def serving_model_fingerprint():
+    """Fingerprint of whichever model answers predictions: the remote server's (from /health) or the local file's.
+
+    None when the server is unreachable or too old to report one; nothing is
+    cached then, since there's no telling which model a score came from.
+    """
+    if not INFERENCE_URL:
+        return local_model_fingerprint()
+    try:
+        return remote_model_fingerprint(INFERENCE_URL)
+    except Exception:
+        return None
+
+@st.cache_resource
+def get_prediction_cache():
+    """Open the on-disk prediction cache shared by all app processes (entries are keyed per model)."""
+    cache = PredictionCache()
+    # hits/misses/evictions only ever grow, so they're exported as counters
+    METRICS.register_collector(lambda: {
+        f"cache_{name}_total" if name in ('hits', 'misses', 'evictions') else f"cache_{name}": value
+        for name, value in cache.stats().items()
+    })
+    return cache
+
+@st.cache_resource
+def start_metrics():
+    """Start the optional /metrics listener / file sink once per process."""
+    start_exporters()
+    return METRICS
+
 # -------------------------------------------------------------
 # Helper Functions
 # -------------------------------------------------------------
-def preprocess_image(image):
-    """Prepare image for prediction."""
-    img = image.resize((224, 224))
-    img_array = np.array(img) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
-    return img_array.astype(np.float32)
-
 def get_dinosaur_message(confidence):
     if confidence > 90:
         return "🦕 EXTREMELY DINOSAUR! You're practically a T-Rex!"
@@ -96,6 +156,158 @@ def get_not_dinosaur_message(confidence):
     else:
         return "🤔 Hmm, this is close! Are you sure you're not hiding scales?"
 
+def analyze_upload(image_bytes, loader, cache, fingerprint):
+    """Classify one upload and build what the page needs to redraw it on reruns."""
+    # Repeat uploads of the same bytes skip the model decode and inference entirely
+    prediction = None
+    if fingerprint is not None:
+        with METRICS.stage('cache_lookup'):
+            prediction = cache.get(image_bytes, fingerprint)
+    if prediction is not None:
+        return {'prediction': prediction, 'display': make_preview(image_bytes, THUMBNAIL_SIZE)}
+
+    with st.spinner("🔍 Analyzing with AI..."):
+        if INFERENCE_URL:
+            # Server down, or it rejected the upload (e.g. HTTP 400 for a corrupt file)
+            try:
+                with METRICS.stage('remote_inference'):
+                    prediction = predict_remote(INFERENCE_URL, image_bytes)
+            except Exception as e:
+                st.error(f"❌ Inference server couldn't classify this image: {e}")
+                st.stop()
+        else:
+            # Draft-decoded at the model's input size, exactly as data prep and
+            # serve.py do, so the same photo gets the same pixels and score
+            try:
+                with METRICS.stage('decode'):
+                    image = decode_image(io.BytesIO(image_bytes))
+            except Exception as e:
+                st.error(f"❌ Couldn't read this image: {e}")
+                st.stop()
+            engine = wait_for_model(loader)
+            with METRICS.stage('preprocess'):
+                img_array = preprocess_image(image)
+            with METRICS.stage('inference'):
+                prediction = float(engine.classify(img_array)[0])
+            loader.record_prediction()
+    if fingerprint is not None:
+        cache.put(image_bytes, prediction, fingerprint)
+
+    return {'prediction': prediction, 'display': make_preview(image_bytes, THUMBNAIL_SIZE)}
+
+def make_preview(image_bytes, size):
+    """Display-only thumbnail, decoded separately so it never changes the model input."""
+    with METRICS.stage('preview'):
+        image = decode_image(io.BytesIO(image_bytes), size)
+        image.thumbnail(size)
+    return image
+
+def decode_into(image_bytes, out):
+    """Decode one upload into its row of the batch buffer."""
+    with METRICS.stage('decode'):
+        image = decode_image(io.BytesIO(image_bytes))
+    with METRICS.stage('preprocess'):
+        preprocess_image(image, out=out)
+
+def classify_uploads(uploads, loader, cache, fingerprint, pool):
+    """Yield the results for each batch of uploads as soon as that batch is classified."""
+    for start in range(0, len(uploads), CLASSROOM_BATCH_SIZE):
+        chunk = uploads[start:start + CLASSROOM_BATCH_SIZE]
+        results = [{'name': f.name, 'bytes': f.getvalue()} for f in chunk]
+
+        # Every tile (cache hit, remote or local) keeps only a grid thumbnail, never the raw upload
+        previews = [pool.submit(make_preview, r['bytes'], GRID_THUMBNAIL_SIZE) for r in results]
+        pending = []
+        for result in results:
+            result['prediction'] = cache.get(result['bytes'], fingerprint) if fingerprint is not None else None
+            if result['prediction'] is None:
+                pending.append(result)
+
+        if pending and INFERENCE_URL:
+            # The server micro-batches concurrent requests on its side. One bad
+            # upload (HTTP 400) only fails its own tile, as on the local path
+            futures = [pool.submit(predict_remote, INFERENCE_URL, r['bytes']) for r in pending]
+            for result, future in zip(pending, futures):
+                try:
+                    result['prediction'] = future.result()
+                except Exception as e:
+                    result['error'] = str(e)
+        elif pending:
+            batch = np.empty((len(pending), *IMG_SIZE, 3), dtype=np.float32)
+            futures = [pool.submit(decode_into, r['bytes'], row) for r, row in zip(pending, batch)]
+            for result, row, future in zip(pending, batch, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    result['error'] = str(e)
+                    row[...] = 0
+            engine = wait_for_model(loader)
+            with METRICS.stage('inference_batch'):
+                scores = engine.classify(batch)
+            loader.record_prediction()
+            for result, score in zip(pending, scores):
+                if 'error' not in result:
+                    result['prediction'] = float(score)
+
+        for result in pending:
+            if result['prediction'] is not None and fingerprint is not None:
+                cache.put(result['bytes'], result['prediction'], fingerprint)
+        for result, preview in zip(results, previews):
+            try:
+                result['display'] = preview.result()
+            except Exception as e:
+                result.setdefault('error', str(e))
+            del result['bytes']
+        yield results
+
+def render_grid(results):
+    """Draw result cards GRID_COLUMNS to a row."""
+    for row_start in range(0, len(results), GRID_COLUMNS):
+        for col, result in zip(st.columns(GRID_COLUMNS), results[row_start:row_start + GRID_COLUMNS]):
+            with col:
+                if 'error' in result:
+                    st.warning(f"❌ {result['name']}: couldn't read image")
+                    continue
+                if result['prediction'] > 0.5:
+                    caption = f"🦕 {result['prediction'] * 100:.0f}% Dinosaur"
+                else:
+                    caption = f"👤 {(1 - result['prediction']) * 100:.0f}% Not a Dinosaur"
+                st.image(result['display'], caption=f"{result['name']} · {caption}", use_column_width=True)
+
+def classroom_mode(loader, cache, fingerprint):
+    """Many uploads at once, results streamed into a grid batch by batch."""
+    uploaded_files = st.file_uploader(
+        "Choose images...",
+        type=['jpg', 'jpeg', 'png'],
+        accept_multiple_files=True,
+        help="Drop a whole folder of photos to analyze them all at once"
+    )
+    if not uploaded_files:
+        return
+
+    # Same rerun memoization as the single-photo view, keyed on the whole set of files
+    upload_ids = tuple(getattr(f, 'file_id', None) or (f.name, f.size) for f in uploaded_files)
+    stored = st.session_state.get('classroom_results')
+    if stored is not None and stored['upload_ids'] == upload_ids:
+        results = stored['results']
+        render_grid(results)
+    else:
+        results = []
+        progress = st.progress(0.0, text="🔍 Analyzing with AI...")
+        with ThreadPoolExecutor(CLASSROOM_DECODE_WORKERS) as pool:
+            for batch_results in classify_uploads(uploaded_files, loader, cache, fingerprint, pool):
+                render_grid(batch_results)
+                results.extend(batch_results)
+                progress.progress(len(results) / len(uploaded_files),
+                                  text=f"🔍 Analyzed {len(results)}/{len(uploaded_files)} photos")
+        progress.empty()
+        st.session_state['classroom_results'] = {'upload_ids': upload_ids, 'results': results}
+
+    scored = [r['prediction'] for r in results if 'error' not in r]
+    dinos = sum(1 for p in scored if p > 0.5)
+    st.markdown("---")
+    st.markdown(f"### 🦕 {dinos} dinosaurs · 👤 {len(scored) - dinos} not dinosaurs")
+
 # -------------------------------------------------------------
 # Streamlit UI
 # -------------------------------------------------------------
@@ -114,27 +326,48 @@ def main():
     *Disclaimer: This is a fun AI project for entertainment purposes!*
     """)
 
-    # Load the model once
-    with st.spinner("🔄 Loading AI model..."):
-        model = load_model()
-    st.success("✅ Model loaded successfully!")
+    # Load the model once, in the background (not needed when a remote inference server is set)
+    if INFERENCE_URL:
+        loader = None
+    else:
+        loader = load_model()
+        if loader.ready():
+            wait_for_model(loader)
+            st.success("✅ Model loaded successfully!")
+        else:
+            st.info("🔄 Warming up the AI model in the background — go ahead and pick a photo!")
 
-    uploaded_file = st.file_uploader(
-        "Choose an image...",
-        type=['jpg', 'jpeg', 'png'],
-        help="Upload a photo to analyze"
-    )
+    cache = get_prediction_cache()
+    fingerprint = serving_model_fingerprint()
+    start_metrics()
+
+    mode = st.radio("Mode", [SINGLE_MODE, CLASSROOM_MODE], horizontal=True, label_visibility="collapsed")
+    if mode == CLASSROOM_MODE:
+        classroom_mode(loader, cache, fingerprint)
+        uploaded_file = None
+    else:
+        uploaded_file = st.file_uploader(
+            "Choose an image...",
+            type=['jpg', 'jpeg', 'png'],
+            help="Upload a photo to analyze"
+        )
 
     if uploaded_file is not None:
-        image = Image.open(uploaded_file).convert('RGB')
+        # Streamlit reruns main() on every widget interaction; only a new file does any work
+        file_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file.name, uploaded_file.size)
+        result = st.session_state.get('upload_result')
+        if result is None or result['file_id'] != file_id:
+            with METRICS.stage('upload'):
+                image_bytes = uploaded_file.getvalue()
+            result = analyze_upload(image_bytes, loader, cache, fingerprint)
+            result['file_id'] = file_id
+            st.session_state['upload_result'] = result
+        prediction = result['prediction']
+        render_started = time.perf_counter()
 
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            st.image(image, caption='Your uploaded image', use_column_width=True)
-
-        with st.spinner("🔍 Analyzing with AI..."):
-            img_array = preprocess_image(image)
-            prediction = float(model.predict(img_array, verbose=0).flatten()[0])
+            st.image(result['display'], caption='Your uploaded image', use_column_width=True)
 
         st.markdown("---")
 
@@ -177,6 +410,18 @@ def main():
                 st.write("✅ Possibly human or object")
                 st.write("✅ Definitely from the modern era (not Jurassic!)")
 
+        METRICS.observe('render', time.perf_counter() - render_started)
+
+    stats = cache.stats()
+    st.sidebar.caption(
+        f"🗄️ Prediction cache: {stats['entries']}/{stats['max_entries']} entries · "
+        f"{stats['hits']} hits · {stats['misses']} misses · {stats['hit_rate']:.0%} hit rate"
+    )
+    if fingerprint is None:
+        st.sidebar.caption("⚠️ Inference server didn't report its model; caching is paused")
+    if loader is not None and loader.first_prediction_seconds is not None:
+        st.sidebar.caption(f"⏱️ Time to first prediction: {loader.first_prediction_seconds:.2f}s")
+
     st.markdown("<hr><center>Made with ❤️ by Aryahvishwa Babu </center>", unsafe_allow_html=True)
 
 # -------------------------------------------------------------
@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from preprocessing import IMG_SIZE
+
+# -------------------------------------------------------------
+# Shared model + preprocessing helpers
+# -------------------------------------------------------------
+# Kept free of Streamlit so the app, the inference server and any
+# offline tooling all load and feed the model the same way.
+
+# 'keras' needs full TensorFlow; 'tflite' only needs a TFLite interpreter (ai-edge-litert / tflite-runtime)
+BACKEND = os.environ.get('DINO_BACKEND', 'keras')
+DEFAULT_MODEL_PATHS = {
+    'keras': 'models/dinosaur_classifier.keras',
+    'tflite': 'models/dinosaur_classifier_int8.tflite',
+}
+MODEL_PATH = os.environ.get('DINO_MODEL_PATH', DEFAULT_MODEL_PATHS[BACKEND])
+TFLITE_THREADS = int(os.environ.get('DINO_TFLITE_THREADS', os.cpu_count() or 1))
+
+# Batch sizes the engine pre-traces; other sizes are padded up to the next bucket
+BATCH_BUCKETS = tuple(int(b) for b in os.environ.get('DINO_BATCH_BUCKETS', '1,4,16').split(','))
+# XLA-compile the forward pass (helps on some CPUs, costs extra compile time at startup)
+JIT_COMPILE = os.environ.get('DINO_JIT_COMPILE', '0') == '1'
+
+
+def load_keras_model(model_path=MODEL_PATH):
+    """Load the trained Keras 3 model (.keras format)."""
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at {model_path}")
+
+    import tensorflow as tf
+
+    # 🧠 Keras 3 fix → disable safety checks for custom / legacy layers
+    return tf.keras.models.load_model(model_path, compile=False, safe_mode=False)
+
+
+def power_of_two_buckets(max_batch_size):
+    """1, 2, 4, ... up to (and including) max_batch_size."""
+    buckets = []
+    size = 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    buckets.append(max_batch_size)
+    return tuple(buckets)
+
+
+def as_batch(arrays):
+    """Stack a (N, 224, 224, 3) array or a list of image arrays into one contiguous float32 batch."""
+    if isinstance(arrays, np.ndarray) and arrays.ndim == 4:
+        batch = arrays
+    else:
+        batch = np.concatenate([np.asarray(a).reshape(-1, *IMG_SIZE, 3) for a in arrays], axis=0)
+    return np.ascontiguousarray(batch, dtype=np.float32)
+
+
+class InferenceEngine:
+    """Fixed-signature forward pass for the classifier.
+
+    model.predict() builds a data adapter and iterator on every call, which
+    dwarfs the actual compute for a single 224×224 image. The engine traces
+    model(x, training=False) once per batch-size bucket up front and calls
+    the concrete functions directly.
+    """
+
+    def __init__(self, model, batch_buckets=BATCH_BUCKETS, jit_compile=JIT_COMPILE):
+        import tensorflow as tf
+
+        self._tf = tf
+        self.batch_buckets = tuple(sorted(set(batch_buckets)))
+        self.jit_compile = jit_compile
+        forward = tf.function(lambda x: model(x, training=False), jit_compile=jit_compile, autograph=False)
+        self._functions = {
+            size: forward.get_concrete_function(tf.TensorSpec((size, *IMG_SIZE, 3), tf.float32))
+            for size in self.batch_buckets
+        }
+        # First call of each concrete function still initializes kernels; pay it now
+        for size in self.batch_buckets:
+            self._run(np.zeros((size, *IMG_SIZE, 3), dtype=np.float32))
+
+    def _run(self, batch):
+        output = self._functions[len(batch)](self._tf.constant(batch))
+        return np.asarray(output).reshape(-1)
+
+    def classify(self, arrays):
+        """Dinosaur probabilities for a (N, 224, 224, 3) array or a list of image arrays."""
+        batch = as_batch(arrays)
+        largest = self.batch_buckets[-1]
+        scores = np.empty(len(batch), dtype=np.float32)
+        for start in range(0, len(batch), largest):
+            chunk = batch[start:start + largest]
+            bucket = next(size for size in self.batch_buckets if size >= len(chunk))
+            if bucket != len(chunk):
+                padded = np.zeros((bucket, *IMG_SIZE, 3), dtype=np.float32)
+                padded[:len(chunk)] = chunk
+                chunk = padded
+            scores[start:start + largest] = self._run(chunk)[:min(largest, len(batch) - start)]
+        return scores
+
+
+def tflite_interpreter_class():
+    """Prefer the standalone LiteRT / tflite-runtime interpreters so full TensorFlow is optional."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteEngine:
+    """Same classify() API as InferenceEngine, backed by a TFLite interpreter.
+
+    Exports from scripts/export_tflite.py keep float32 inputs/outputs (int8
+    variants quantize internally), so callers don't care which one is loaded.
+    """
+
+    def __init__(self, model_path, num_threads=TFLITE_THREADS):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model not found at {model_path}")
+        self.num_threads = num_threads
+        self._interpreter = tflite_interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self._input_index = self._interpreter.get_input_details()[0]['index']
+        self._output_index = self._interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        # An interpreter holds its tensors in place, so one invoke at a time
+        self._lock = threading.Lock()
+        self.classify(np.zeros((1, *IMG_SIZE, 3), dtype=np.float32))
+
+    def classify(self, arrays):
+        """Dinosaur probabilities for a (N, 224, 224, 3) array or a list of image arrays."""
+        batch = as_batch(arrays)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input_index, batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = len(batch)
+            self._interpreter.set_tensor(self._input_index, batch)
+            self._interpreter.invoke()
+            return self._interpreter.get_tensor(self._output_index).reshape(-1).copy()
+
+
+def load_engine(model_path=MODEL_PATH, backend=BACKEND, batch_buckets=BATCH_BUCKETS):
+    """Build the classify() engine for the configured backend."""
+    if backend == 'tflite':
+        return TFLiteEngine(model_path)
+    if backend == 'keras':
+        return InferenceEngine(load_keras_model(model_path), batch_buckets)
+    raise ValueError(f"Unknown backend {backend!r} (expected 'keras' or 'tflite')")
+
+
+class BackgroundModelLoader:
+    """Import the backend, load the model and build its engine on a background thread.
+
+    Lets the page render immediately on a cold start; callers block on
+    result() only once they actually need a prediction.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, backend=BACKEND):
+        self.model_path = model_path
+        self.backend = backend
+        self.started = time.perf_counter()
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.first_prediction_seconds = None
+        self._engine = None
+        self._error = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def _load(self):
+        try:
+            if self.backend == 'keras':
+                model = load_keras_model(self.model_path)
+                self.load_seconds = time.perf_counter() - self.started
+                # Tracing every bucket doubles as the warm-up inference
+                engine = InferenceEngine(model)
+            else:
+                engine = load_engine(self.model_path, self.backend)
+                self.load_seconds = time.perf_counter() - self.started
+            self.warmup_seconds = time.perf_counter() - self.started - self.load_seconds
+            self._engine = engine
+        except Exception as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def ready(self):
+        return self._ready.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the warmed-up engine (re-raises any load error)."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Model not ready after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._engine
+
+    def record_prediction(self):
+        """Record time-to-first-prediction (from loader start) the first time it's called."""
+        with self._lock:
+            if self.first_prediction_seconds is None:
+                self.first_prediction_seconds = time.perf_counter() - self.started
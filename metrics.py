@@ -0,0 +1,186 @@
+"""
+Hot-path latency metrics for the inference path.
+
+    with METRICS.stage('decode'):
+        image = decode_image(...)
+
+Each stage keeps a count, a running sum and a rolling window of recent
+samples for p50/p95/p99. Gauges (model load time, cache stats, ...) are
+either set directly or pulled from registered collectors at export time.
+Values whose name ends in _total are monotonic counts and are exported
+with the Prometheus counter type, so rate() and friends treat them right.
+
+Everything is exported in Prometheus text format: serve.py answers
+GET /metrics itself, and any process can also start a tiny /metrics
+listener (DINO_METRICS_PORT) and/or rewrite a file sink every few seconds
+(DINO_METRICS_FILE). DINO_METRICS=0 turns all of it into no-ops.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+METRICS_ENABLED = os.environ.get('DINO_METRICS', '1') != '0'
+METRICS_PORT = int(os.environ.get('DINO_METRICS_PORT', 0))
+METRICS_FILE = os.environ.get('DINO_METRICS_FILE')
+METRICS_FILE_INTERVAL = float(os.environ.get('DINO_METRICS_FILE_INTERVAL', 10.0))
+WINDOW_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'dino'
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class RollingHistogram:
+    """Count + sum over the process lifetime, quantiles over the last WINDOW_SIZE samples."""
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.count = 0
+        self.total = 0.0
+        self._window = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self._window.append(seconds)
+
+    def quantiles(self, quantiles=QUANTILES):
+        with self._lock:
+            window = np.fromiter(self._window, dtype=np.float64, count=len(self._window))
+        if not len(window):
+            return {q: float('nan') for q in quantiles}
+        return dict(zip(quantiles, np.quantile(window, quantiles)))
+
+
+class Metrics:
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._histograms = {}
+        self._gauges = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, RollingHistogram())
+        return histogram
+
+    def stage(self, name):
+        """Context manager timing one stage of the hot path (no-op when disabled)."""
+        if not self.enabled:
+            return nullcontext()
+        return _Timer(self.histogram(name))
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def set_gauge(self, name, value):
+        if self.enabled and value is not None:
+            self._gauges[name] = float(value)
+
+    def register_collector(self, collector):
+        """collector() -> {name: value}, called on every export (name ending in _total = counter)."""
+        if self.enabled:
+            self._collectors.append(collector)
+
+    def snapshot(self):
+        """{'stages': {name: {count, sum, p50, p95, p99}}, 'gauges': {name: value}}."""
+        gauges = dict(self._gauges)
+        for collector in list(self._collectors):
+            try:
+                gauges.update({k: float(v) for k, v in collector().items() if v is not None})
+            except Exception:
+                pass
+        stages = {}
+        for name, histogram in sorted(self._histograms.items()):
+            row = {'count': histogram.count, 'sum': histogram.total}
+            for q, value in histogram.quantiles().items():
+                row[f"p{int(q * 100)}"] = value
+            stages[name] = row
+        return {'stages': stages, 'gauges': gauges}
+
+    def render_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {PREFIX}_stage_seconds Latency of each inference-path stage",
+            f"# TYPE {PREFIX}_stage_seconds summary",
+        ]
+        for name, row in snapshot['stages'].items():
+            for q in QUANTILES:
+                lines.append(f'{PREFIX}_stage_seconds{{stage="{name}",quantile="{q}"}} {row[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {row["sum"]:.6f}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {row["count"]}')
+        for name, value in sorted(snapshot['gauges'].items()):
+            lines.append(f"# TYPE {PREFIX}_{name} {'counter' if name.endswith('_total') else 'gauge'}")
+            lines.append(f"{PREFIX}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically replace `path` with the current Prometheus text (node-exporter textfile style)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+
+def start_exporters(metrics=METRICS, port=METRICS_PORT, file_path=METRICS_FILE,
+                    file_interval=METRICS_FILE_INTERVAL):
+    """Start the optional /metrics listener and file sink (daemon threads). Call once per process."""
+    if not metrics.enabled:
+        return
+
+    if port:
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode()
+                self.send_response(200 if self.path == '/metrics' else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics on http://0.0.0.0:{port}/metrics")
+
+    if file_path:
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        def write_forever():
+            while True:
+                time.sleep(file_interval)
+                try:
+                    metrics.write_file(file_path)
+                except OSError as e:
+                    print(f"⚠️  Could not write metrics to {file_path}: {e}")
+
+        threading.Thread(target=write_forever, name="metrics-file", daemon=True).start()
@@ -0,0 +1,161 @@
+"""
+Disk-backed prediction cache shared by every process serving the app.
+
+Entries are keyed by sha256(model fingerprint + uploaded bytes), so a
+repeat upload skips decode and inference entirely and a new model file
+never serves stale scores. The fingerprint can be given per call, so one
+cache (and one set of connections) serves whichever model is current. SQLite in WAL mode handles concurrent readers
+and writers across Streamlit workers; eviction is LRU on last access,
+bounded by entry count and TTL.
+
+Hits stay reads so workers don't queue on the write lock: a row's access
+time is only rewritten once it is CACHE_ACCESS_RESOLUTION_SECONDS stale,
+hit/miss counters are summed in memory and flushed every
+COUNTER_FLUSH_EVERY lookups, and eviction runs every CACHE_EVICT_EVERY puts
+(so the table can briefly exceed max_entries by that many rows per process).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = os.environ.get('DINO_CACHE_PATH', 'cache/predictions.sqlite3')
+CACHE_MAX_ENTRIES = int(os.environ.get('DINO_CACHE_MAX_ENTRIES', 50_000))
+CACHE_TTL_SECONDS = float(os.environ.get('DINO_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+CACHE_ACCESS_RESOLUTION_SECONDS = float(os.environ.get('DINO_CACHE_ACCESS_RESOLUTION_SECONDS', 60))
+CACHE_EVICT_EVERY = int(os.environ.get('DINO_CACHE_EVICT_EVERY', 64))
+COUNTER_FLUSH_EVERY = 64
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """sha256 of a file's contents (used to tie cache entries to one model file)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, path=CACHE_PATH, model_fingerprint='', max_entries=CACHE_MAX_ENTRIES,
+                 ttl_seconds=CACHE_TTL_SECONDS, access_resolution_seconds=CACHE_ACCESS_RESOLUTION_SECONDS,
+                 evict_every=CACHE_EVICT_EVERY):
+        self.path = path
+        self.model_fingerprint = model_fingerprint
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.access_resolution_seconds = access_resolution_seconds
+        self.evict_every = max(1, evict_every)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {'hits': 0, 'misses': 0}
+        self._puts = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    key TEXT PRIMARY KEY,
+                    score REAL NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON predictions (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads; Streamlit runs each session on its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, image_bytes, model_fingerprint=None):
+        if model_fingerprint is None:
+            model_fingerprint = self.model_fingerprint
+        digest = hashlib.sha256(model_fingerprint.encode())
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _count(self, name):
+        with self._lock:
+            self._pending[name] += 1
+            flush = sum(self._pending.values()) >= COUNTER_FLUSH_EVERY
+        if flush:
+            self._flush_counters(self._conn())
+
+    def _flush_counters(self, conn):
+        with self._lock:
+            pending = self._pending
+            self._pending = dict.fromkeys(pending, 0)
+        for name, amount in pending.items():
+            if amount:
+                self._bump(conn, name, amount)
+
+    def get(self, image_bytes, model_fingerprint=None):
+        """Return the cached score for these bytes, or None on a miss."""
+        key = self.key(image_bytes, model_fingerprint)
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT score, created, last_access FROM predictions WHERE key = ?",
+                           (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            self._count('misses')
+            return None
+        # LRU only needs coarse access times, so most hits don't write at all
+        if now - row[2] > self.access_resolution_seconds:
+            conn.execute("UPDATE predictions SET last_access = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return row[0]
+
+    def put(self, image_bytes, score, model_fingerprint=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO predictions (key, score, created, last_access) VALUES (?, ?, ?, ?)",
+            (self.key(image_bytes, model_fingerprint), float(score), now, now),
+        )
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.evict_every == 0
+        if evict:
+            self._evict(conn, now)
+            self._flush_counters(conn)
+
+    def _evict(self, conn, now):
+        expired = conn.execute(
+            "DELETE FROM predictions WHERE created < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = conn.execute(
+            "DELETE FROM predictions WHERE key IN ("
+            "SELECT key FROM predictions ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        if expired + overflow:
+            self._bump(conn, 'evictions', expired + overflow)
+
+    def stats(self):
+        conn = self._conn()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        with self._lock:
+            for name, amount in self._pending.items():
+                counters[name] += amount
+        entries = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'evictions': counters['evictions'],
+            'hit_rate': counters['hits'] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,83 @@
+import numpy as np
+from PIL import Image
+
+# -------------------------------------------------------------
+# Shared image preprocessing (serving + data prep)
+# -------------------------------------------------------------
+# Serving and scripts/data_prep.py both go through these helpers so
+# train-time and serve-time images are decoded and resized identically.
+#
+# Pixels stay uint8 until the single cast into the float32 model input,
+# and stay in the raw 0–255 range: the model starts with its own
+# Rescaling(1/255) layer, exactly as it saw images during training.
+
+IMG_SIZE = (224, 224)
+
+
+def decode_image(source, min_size=IMG_SIZE):
+    """Open an image (path, file object or upload) as RGB.
+
+    JPEGs are decoded in draft mode straight to the smallest 1/2, 1/4 or
+    1/8 scale that is still at least min_size, so a 12 MP phone photo
+    never gets fully decoded just to end up as 224×224.
+    """
+    img = Image.open(source)
+    if img.format == 'JPEG':
+        img.draft('RGB', min_size)
+    return img.convert('RGB')
+
+
+def fit_to_model(img, size=IMG_SIZE):
+    """Resize to the model's input size (LANCZOS, as in data prep)."""
+    if img.size == size:
+        return img
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def preprocess_image(image, out=None):
+    """Prepare an RGB PIL image for prediction as a (1, 224, 224, 3) float32 array.
+
+    Pass `out` (any float32 array with 224*224*3 elements, e.g. one row of a
+    preallocated batch) to write in place instead of allocating.
+    """
+    pixels = np.asarray(fit_to_model(image))
+    if out is None:
+        out = np.empty((1, *IMG_SIZE, 3), dtype=np.float32)
+    # The only float copy: uint8 → float32 straight into the destination buffer
+    np.copyto(out.reshape(pixels.shape), pixels, casting='unsafe')
+    return out
+
+
+def load_image_for_model(source, out=None):
+    """Decode + preprocess in one go (for callers that don't need the PIL image)."""
+    return preprocess_image(decode_image(source), out)
+
+
+def lanczos_weights(in_size, out_size, support=3.0):
+    """(out_size, in_size) Lanczos-3 resampling matrix, same kernel and
+    pixel-centre convention as Pillow's LANCZOS filter."""
+    scale = in_size / out_size
+    filter_scale = max(scale, 1.0)
+    centers = (np.arange(out_size) + 0.5) * scale
+    x = (np.arange(in_size)[None, :] + 0.5 - centers[:, None]) / filter_scale
+    weights = np.sinc(x) * np.sinc(x / support)
+    weights[np.abs(x) >= support] = 0.0
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def resize_batch(images, size=IMG_SIZE):
+    """Resize a whole (N, H, W, 3) uint8 batch at once → (N, size[1], size[0], 3) uint8.
+
+    Separable Lanczos as two matrix products, horizontal pass first with the
+    intermediate rounded to uint8 like Pillow does, so it matches
+    fit_to_model() to within rounding without a PIL round trip per image.
+    """
+    height, width = images.shape[1:3]
+    rows = lanczos_weights(height, size[1]).astype(np.float32)
+    cols = lanczos_weights(width, size[0]).astype(np.float32)
+    count, channels = len(images), images.shape[3]
+    # (N, H, C, W) @ (W, W') → (N, H, C, W'), then (H', H) @ (N, H, C·W')
+    horizontal = images.transpose(0, 1, 3, 2).astype(np.float32) @ cols.T
+    horizontal = np.clip(np.rint(horizontal), 0, 255).reshape(count, height, -1)
+    resized = (rows @ horizontal).reshape(count, size[1], channels, size[0])
+    return np.clip(np.rint(resized), 0, 255).astype(np.uint8).transpose(0, 1, 3, 2)
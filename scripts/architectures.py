@@ -0,0 +1,211 @@
+"""
+Model definitions shared by the training script and the benchmarks, so a
+randomly initialized copy of the served architecture can be built without
+training anything.
+
+    baseline    3×(Conv2D, MaxPooling) → Flatten → Dense(128): ~6.4M params,
+                almost all of them in the Dense layer
+    gap         the same conv stack with a global-average-pooling head
+    separable   strided stem + depthwise-separable conv blocks + GAP head
+
+gap and separable take a width multiplier that scales every conv's filters.
+scripts/compare_architectures.py trains them side by side and reports
+params, FLOPs, file size, CPU latency and validation accuracy.
+
+BACKBONES / build_backbone() and build_head() are the frozen-backbone
+transfer learning pieces used by scripts/train_transfer.py.
+"""
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+from tensorflow.keras.models import Sequential
+
+
+def build_augmentation(img_height=224, img_width=224, seed=None):
+    """Random transformations that yield believable-looking images.
+
+    Training-only: applied in the input pipeline with augment_dataset(),
+    not saved as part of the model.
+    """
+    return keras.Sequential(
+      [
+        layers.RandomFlip("horizontal", seed=seed),
+        layers.RandomRotation(0.1, seed=seed),
+        layers.RandomZoom(0.1, seed=seed),
+      ]
+    )
+
+
+def augment_dataset(dataset, augmentation, num_parallel_calls=tf.data.AUTOTUNE, deterministic=False):
+    """Apply augmentation to every (images, labels) batch as a parallel tf.data map.
+
+    Runs on the input pipeline's thread pool, overlapping the training step,
+    instead of single-threaded inside it. deterministic=False lets batches
+    come out in whichever order they finish (faster, but the epoch order then
+    varies slightly between runs even with a fixed seed).
+    """
+    return dataset.map(lambda images, labels: (augmentation(images, training=True), labels),
+                       num_parallel_calls=num_parallel_calls, deterministic=deterministic)
+
+
+def filters(base, width=1.0):
+    """Conv filter count scaled by a width multiplier (at least 8)."""
+    return max(8, int(round(base * width)))
+
+
+def build_baseline_cnn(img_height=224, img_width=224, data_augmentation=None):
+    """Rescaling → 3×(Conv2D, MaxPooling, Dropout) → Flatten → Dense(128) → sigmoid.
+
+    Augmentation is no longer part of the model (see augment_dataset());
+    passing data_augmentation still puts it in front, as older models had it.
+    """
+    return Sequential([
+      keras.Input((img_height, img_width, 3)),
+      *([data_augmentation] if data_augmentation is not None else []),
+      layers.Rescaling(1./255),  # Your images are 224×224
+      layers.Conv2D(16, 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.2),
+      layers.Conv2D(32, 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.3),
+      layers.Conv2D(64, 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.4),
+      layers.Flatten(),
+      layers.Dense(128, activation='relu'),
+      layers.Dense(1, activation='sigmoid')  # Changed for binary classification!
+    ])
+
+
+def build_gap_cnn(img_height=224, img_width=224, width=1.0):
+    """Baseline conv stack, but GlobalAveragePooling instead of Flatten → Dense(128).
+
+    Replaces the 28×28×64 → 128 Dense layer (6.4M of the baseline's 6.45M
+    parameters) with a 64-value average per channel.
+    """
+    return Sequential([
+      keras.Input((img_height, img_width, 3)),
+      layers.Rescaling(1./255),
+      layers.Conv2D(filters(16, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.2),
+      layers.Conv2D(filters(32, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.3),
+      layers.Conv2D(filters(64, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.GlobalAveragePooling2D(),
+      layers.Dropout(0.4),
+      layers.Dense(1, activation='sigmoid')
+    ])
+
+
+def build_separable_cnn(img_height=224, img_width=224, width=1.0):
+    """Strided Conv2D stem → 3×(SeparableConv2D, MaxPooling) → GlobalAveragePooling.
+
+    The stem halves the resolution straight away and each separable conv is
+    a 3×3 depthwise + 1×1 pointwise pair, so it needs roughly a fifth of the
+    baseline's multiply-adds while going one block deeper.
+    """
+    return Sequential([
+      keras.Input((img_height, img_width, 3)),
+      layers.Rescaling(1./255),
+      layers.Conv2D(filters(16, width), 3, strides=2, padding='same', activation='relu'),
+      layers.SeparableConv2D(filters(32, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.2),
+      layers.SeparableConv2D(filters(64, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.Dropout(0.3),
+      layers.SeparableConv2D(filters(128, width), 3, padding='same', activation='relu'),
+      layers.MaxPooling2D(),
+      layers.GlobalAveragePooling2D(),
+      layers.Dropout(0.4),
+      layers.Dense(1, activation='sigmoid')
+    ])
+
+
+ARCHITECTURES = {
+    'baseline': lambda img_height, img_width, width=1.0: build_baseline_cnn(img_height, img_width),
+    'gap': build_gap_cnn,
+    'separable': build_separable_cnn,
+}
+
+# What train_my_model.py trains, and so what the benchmarks' stand-in model is
+DEFAULT_ARCHITECTURE = 'gap'
+DEFAULT_WIDTH = 1.0
+
+
+def build_model(name, img_height=224, img_width=224, width=1.0):
+    """Build one of ARCHITECTURES by name (width is ignored for baseline)."""
+    if name not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture {name!r} (expected one of {', '.join(ARCHITECTURES)})")
+    return ARCHITECTURES[name](img_height, img_width, width=width)
+
+
+def count_flops(model):
+    """Forward-pass FLOPs for one image (2 per multiply-add) of the conv and dense layers.
+
+    Pooling, activations and rescaling are left out; they are a rounding
+    error next to the convolutions.
+    """
+    macs = 0
+    for layer in model.layers:
+        if isinstance(layer, (layers.Conv2D, layers.SeparableConv2D, layers.DepthwiseConv2D, layers.Dense)):
+            in_channels = layer.input.shape[-1]
+            out_positions = int(np.prod(layer.output.shape[1:-1]))
+            out_channels = layer.output.shape[-1]
+        if isinstance(layer, layers.SeparableConv2D):
+            depthwise = int(np.prod(layer.kernel_size)) * in_channels * layer.depth_multiplier
+            macs += out_positions * (depthwise + in_channels * layer.depth_multiplier * out_channels)
+        elif isinstance(layer, layers.DepthwiseConv2D):
+            macs += out_positions * int(np.prod(layer.kernel_size)) * in_channels * layer.depth_multiplier
+        elif isinstance(layer, layers.Conv2D):
+            macs += out_positions * int(np.prod(layer.kernel_size)) * in_channels * out_channels
+        elif isinstance(layer, layers.Dense):
+            macs += out_positions * in_channels * out_channels
+    return 2 * macs
+
+
+# Frozen ImageNet backbones for transfer learning (scripts/train_transfer.py).
+# name → (keras.applications class, input scaling from 0-255 pixels)
+BACKBONES = {
+    'mobilenet_v2': ('MobileNetV2', lambda: layers.Rescaling(1./127.5, offset=-1)),
+    'efficientnet_b0': ('EfficientNetB0', None),  # rescales 0-255 input itself
+}
+
+
+def build_backbone(name, weights_path, img_height=224, img_width=224):
+    """Frozen feature extractor: 0-255 float images → pooled embedding vector.
+
+    Weights come from a local file (e.g. Keras's *_no_top.h5 download), so
+    nothing is fetched at training time.
+    """
+    if name not in BACKBONES:
+        raise ValueError(f"Unknown backbone {name!r} (expected one of {', '.join(BACKBONES)})")
+    class_name, make_scaling = BACKBONES[name]
+    base = getattr(keras.applications, class_name)(include_top=False, weights=weights_path,
+                                                   input_shape=(img_height, img_width, 3), pooling='avg')
+    inputs = keras.Input((img_height, img_width, 3))
+    x = make_scaling()(inputs) if make_scaling else inputs
+    backbone = keras.Model(inputs, base(x, training=False), name=f"{name}_backbone")
+    backbone.trainable = False
+    return backbone
+
+
+def build_head(name, dim, dropout=0.2):
+    """Small classifier on top of backbone embeddings: 'linear' or 'mlp'."""
+    if name == 'linear':
+        hidden = []
+    elif name == 'mlp':
+        hidden = [layers.Dense(128, activation='relu')]
+    else:
+        raise ValueError(f"Unknown head {name!r} (expected 'linear' or 'mlp')")
+    return Sequential([
+      keras.Input((dim,)),
+      *hidden,
+      layers.Dropout(dropout),
+      layers.Dense(1, activation='sigmoid')
+    ], name=f"{name}_head")
@@ -0,0 +1,72 @@
+"""
+Compare per-call latency of model.predict() against InferenceEngine.classify()
+for single-image requests (what app.py does on every upload).
+
+    python scripts/benchmark_classify.py --model models/dinosaur_classifier.keras --iterations 200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inference import IMG_SIZE, MODEL_PATH, InferenceEngine, load_keras_model
+
+
+def time_calls(fn, iterations):
+    """Latencies in milliseconds for `iterations` calls of fn()."""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def summarize(name, latencies):
+    print(f"{name:30s} | mean {latencies.mean():7.2f}ms | p50 {np.percentile(latencies, 50):7.2f}ms "
+          f"| p99 {np.percentile(latencies, 99):7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--jit", action="store_true", help="also benchmark the XLA-compiled engine")
+    args = parser.parse_args()
+
+    model = load_keras_model(args.model)
+    img_array = np.random.rand(1, *IMG_SIZE, 3).astype(np.float32) * 255
+
+    print("🦖 Single-image inference latency\n")
+    print("=" * 78)
+    results = {}
+
+    predict = lambda: model.predict(img_array, verbose=0)
+    time_calls(predict, args.warmup)
+    results["model.predict"] = time_calls(predict, args.iterations)
+
+    engines = {"InferenceEngine.classify": InferenceEngine(model, batch_buckets=(1,))}
+    if args.jit:
+        engines["InferenceEngine.classify(jit)"] = InferenceEngine(model, batch_buckets=(1,), jit_compile=True)
+    for name, engine in engines.items():
+        classify = lambda: engine.classify(img_array)
+        time_calls(classify, args.warmup)
+        results[name] = time_calls(classify, args.iterations)
+
+    for name, latencies in results.items():
+        summarize(name, latencies)
+    print("=" * 78)
+
+    baseline = np.percentile(results["model.predict"], 50)
+    for name, latencies in results.items():
+        if name != "model.predict":
+            print(f"⚡ {name}: {baseline / np.percentile(latencies, 50):.1f}× faster (p50) than model.predict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Reproducible inference micro-benchmarks with regression gating.
+
+Measures, on synthetic images and a randomly initialized model of the
+training architecture (no dataset or trained weights needed):
+  - decode latency per format × resolution (draft-mode decode_image)
+  - preprocess latency per format × resolution (resize + cast into the model input)
+  - forward-pass latency and throughput per batch size × thread count,
+    each thread count in its own process so its peak RSS is measured cleanly
+
+    python scripts/benchmark_suite.py --output bench.json
+    python scripts/benchmark_suite.py --output bench.json --save-baseline benchmarks/baseline.json
+    python scripts/benchmark_suite.py --baseline benchmarks/baseline.json --threshold 0.15
+
+With --baseline, every p50 that got slower than baseline × (1 + threshold)
+is reported and the script exits with status 1.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocessing import IMG_SIZE, decode_image, preprocess_image
+
+FORMATS = {'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}
+DEFAULT_RESOLUTIONS = ['640x480', '1920x1080', '4032x3024']
+
+
+def synthetic_image(width, height, seed=0):
+    """Smooth gradients plus mild noise: compresses like a photo, unlike pure noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    pixels = np.stack([
+        127 + 127 * np.sin(x / (width / 6.0)),
+        127 + 127 * np.cos(y / (height / 5.0)),
+        127 + 127 * np.sin((x + y) / ((width + height) / 9.0)),
+    ], axis=-1)
+    pixels += rng.normal(0, 8, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def encode(image, fmt):
+    buffer = io.BytesIO()
+    options = {} if fmt == 'png' else {'quality': 90}
+    image.save(buffer, FORMATS[fmt], **options)
+    return buffer.getvalue()
+
+
+def latency_stats(latencies_s, items_per_call=1):
+    latencies_ms = np.asarray(latencies_s) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'mean_ms': float(latencies_ms.mean()),
+        'throughput_per_s': float(items_per_call * 1000 / latencies_ms.mean()),
+    }
+
+
+def time_calls(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1e6 if sys.platform == 'darwin' else 1e3)
+
+
+def bench_image_pipeline(resolutions, formats, iterations):
+    results = {}
+    for resolution in resolutions:
+        width, height = (int(v) for v in resolution.split('x'))
+        image = synthetic_image(width, height)
+        for fmt in formats:
+            data = encode(image, fmt)
+            decoded = decode_image(io.BytesIO(data))
+            out = np.empty((1, *IMG_SIZE, 3), dtype=np.float32)
+            results[f"decode/{fmt}/{resolution}"] = {
+                'bytes': len(data),
+                **latency_stats(time_calls(lambda: decode_image(io.BytesIO(data)), iterations)),
+            }
+            results[f"preprocess/{fmt}/{resolution}"] = latency_stats(
+                time_calls(lambda: preprocess_image(decoded, out=out), iterations)
+            )
+            print(f"  {fmt:5s} {resolution:>10s}: decode p50 {results[f'decode/{fmt}/{resolution}']['p50_ms']:7.2f}ms"
+                  f" · preprocess p50 {results[f'preprocess/{fmt}/{resolution}']['p50_ms']:6.2f}ms")
+    return results
+
+
+def bench_forward(threads, batch_sizes, iterations, seed=42):
+    """Runs in a fresh process: TF thread pools can only be sized before first use."""
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.keras.utils.set_random_seed(seed)
+
+    from architectures import DEFAULT_ARCHITECTURE, DEFAULT_WIDTH, build_model
+    from inference import InferenceEngine
+
+    rss_before_model = peak_rss_mb()
+    engine = InferenceEngine(build_model(DEFAULT_ARCHITECTURE, *IMG_SIZE, width=DEFAULT_WIDTH),
+                             batch_buckets=batch_sizes)
+    rng = np.random.default_rng(seed)
+
+    results = {}
+    for batch_size in batch_sizes:
+        batch = rng.uniform(0, 255, (batch_size, *IMG_SIZE, 3)).astype(np.float32)
+        results[f"forward/threads={threads}/batch={batch_size}"] = latency_stats(
+            time_calls(lambda: engine.classify(batch), iterations), items_per_call=batch_size
+        )
+    results[f"memory/threads={threads}"] = {
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_before_model_mb': rss_before_model,
+    }
+    return results
+
+
+def machine_metadata():
+    metadata = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pillow': Image.__version__,
+    }
+    try:
+        with open('/proc/cpuinfo') as f:
+            metadata['cpu_model'] = next(
+                (line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), None
+            )
+    except OSError:
+        metadata['cpu_model'] = platform.processor()
+    for distribution in ('tensorflow', 'tensorflow-cpu', 'keras', 'ai-edge-litert'):
+        try:
+            metadata[distribution] = version(distribution)
+        except PackageNotFoundError:
+            pass
+    try:
+        metadata['git_commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        metadata['git_commit'] = None
+    return metadata
+
+
+def compare(results, baseline, threshold, metric='p50_ms'):
+    """[(name, baseline, current, change)] for every benchmark slower than allowed."""
+    regressions = []
+    print("\n" + "=" * 78)
+    print(f"📊 COMPARISON AGAINST BASELINE ({metric}, threshold +{threshold:.0%})")
+    print("=" * 78)
+    for name, row in results.items():
+        if metric not in row or metric not in baseline.get(name, {}):
+            continue
+        before, after = baseline[name][metric], row[metric]
+        change = (after - before) / before if before else 0.0
+        marker = "❌" if change > threshold else "✅"
+        print(f"{marker} {name:40s} {before:9.2f} → {after:9.2f} ({change:+.1%})")
+        if change > threshold:
+            regressions.append((name, before, after, change))
+    print("=" * 78)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolutions", nargs='+', default=DEFAULT_RESOLUTIONS, help="WIDTHxHEIGHT")
+    parser.add_argument("--formats", nargs='+', default=list(FORMATS), choices=list(FORMATS))
+    parser.add_argument("--batch-sizes", nargs='+', type=int, default=[1, 4, 16, 32])
+    parser.add_argument("--threads", nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--output", default='benchmark_results.json')
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, e.g. 0.10 = 10%%")
+    parser.add_argument("--save-baseline", help="also write these results as the new baseline here")
+    args = parser.parse_args()
+
+    print("🦖 Inference benchmark suite\n")
+    print("🖼️  Decode + preprocess")
+    results = bench_image_pipeline(args.resolutions, args.formats, args.iterations)
+
+    print("\n🧠 Forward pass (randomly initialized training architecture)")
+    spawn = multiprocessing.get_context('spawn')
+    for threads in args.threads:
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            forward = pool.submit(bench_forward, threads, tuple(args.batch_sizes), args.iterations).result()
+        results.update(forward)
+        for batch_size in args.batch_sizes:
+            row = forward[f"forward/threads={threads}/batch={batch_size}"]
+            print(f"  threads={threads} batch={batch_size:3d}: p50 {row['p50_ms']:8.2f}ms "
+                  f"· {row['throughput_per_s']:7.1f} img/s")
+        print(f"  threads={threads} peak RSS {forward[f'memory/threads={threads}']['peak_rss_mb']:.0f} MB")
+    results["memory/image_pipeline"] = {'peak_rss_mb': peak_rss_mb()}
+
+    report = {'metadata': machine_metadata(), 'config': vars(args), 'results': results}
+    for path in filter(None, [args.output, args.save_baseline]):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Results saved to: {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['metadata'].get('cpu_model') != report['metadata'].get('cpu_model'):
+            print("⚠️  Baseline was recorded on a different CPU; comparisons may not be meaningful")
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Train the candidate architectures side by side and pick the fastest one that
+is accurate enough to serve.
+
+    python scripts/compare_architectures.py --accuracy-floor 0.93
+    python scripts/compare_architectures.py --architectures gap separable --widths 1.0 0.5 --epochs 15
+
+Every architecture × width from architectures.py is trained on the same
+data (the packed dataset when data_prep.py wrote one, otherwise the
+processed folders) with the same augmentation and early stopping, saved to
+models/architectures/<name>.keras, and reported with:
+  - parameter count and forward-pass FLOPs per image
+  - serialized .keras size
+  - load time (load + trace, what app.py pays at startup)
+  - CPU latency for one image through InferenceEngine (p50 / p95)
+  - validation accuracy
+
+The winner is the lowest-latency candidate whose accuracy is at least
+--accuracy-floor; --promote copies it to models/dinosaur_classifier.keras.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmark_suite import latency_stats, time_calls
+from preprocessing import IMG_SIZE
+
+
+def load_datasets(processed_root, batch_size=32, seed=123):
+    """(train_ds, test_ds) from the packed dataset if there is one, else the processed folders."""
+    import tensorflow as tf
+
+    from packed_dataset import folder_dataset, packed_dataset
+    from validate_images import iter_image_files, validate_paths
+
+    packed_dir = os.path.join(processed_root, 'packed')
+    if os.path.exists(os.path.join(packed_dir, 'train', 'index.json')):
+        return (packed_dataset(os.path.join(packed_dir, 'train'), batch_size, shuffle=True, seed=seed),
+                packed_dataset(os.path.join(packed_dir, 'test'), batch_size))
+    train_dir, test_dir = os.path.join(processed_root, 'train'), os.path.join(processed_root, 'test')
+    # Same check as train_my_model.py (cached, so only new files are opened)
+    skip = validate_paths(list(iter_image_files([train_dir, test_dir])))
+    train_ds, _ = folder_dataset(train_dir, batch_size, IMG_SIZE, skip, seed=seed)
+    test_ds, _ = folder_dataset(test_dir, batch_size, IMG_SIZE, skip, shuffle=False)
+    return train_ds.cache().shuffle(1000, seed=seed), test_ds.cache().prefetch(tf.data.AUTOTUNE)
+
+
+def train_candidate(model, train_ds, test_ds, epochs, patience=2):
+    """Fit with the training script's settings; returns (val_accuracy, epochs run, seconds)."""
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    started = time.perf_counter()
+    history = model.fit(train_ds, validation_data=test_ds, epochs=epochs, verbose=2,
+                        callbacks=[EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)])
+    elapsed = time.perf_counter() - started
+    _, accuracy = model.evaluate(test_ds, verbose=0)
+    return float(accuracy), len(history.history['loss']), elapsed
+
+
+def measure_serving(model_path, iterations=50):
+    """Load time and batch-1 CPU latency of a saved model, the way app.py runs it."""
+    from inference import InferenceEngine, load_keras_model
+
+    started = time.perf_counter()
+    engine = InferenceEngine(load_keras_model(model_path), batch_buckets=(1,))
+    load_seconds = time.perf_counter() - started
+    image = np.random.default_rng(0).uniform(0, 255, (1, *IMG_SIZE, 3)).astype(np.float32)
+    return {'load_s': load_seconds, **latency_stats(time_calls(lambda: engine.classify(image), iterations))}
+
+
+def pick_winner(report, accuracy_floor):
+    """Name of the lowest-latency candidate with accuracy ≥ accuracy_floor (None if none qualifies)."""
+    eligible = [name for name, row in report.items() if row['accuracy'] >= accuracy_floor]
+    return min(eligible, key=lambda name: report[name]['p50_ms'], default=None)
+
+
+def print_report(report, winner=None):
+    print("\n" + "=" * 104)
+    print("📊 ARCHITECTURE COMPARISON")
+    print("=" * 104)
+    print(f"{'model':18s} | {'params':>9s} | {'MFLOPs':>8s} | {'size MB':>7s} | {'load s':>6s} | "
+          f"{'p50 ms':>7s} | {'p95 ms':>7s} | {'accuracy':>8s} | {'train s':>7s}")
+    for name, row in report.items():
+        marker = " ⭐" if name == winner else ""
+        print(f"{name:18s} | {row['params']:9,d} | {row['flops'] / 1e6:8.1f} | {row['size_mb']:7.2f} | "
+              f"{row['load_s']:6.2f} | {row['p50_ms']:7.2f} | {row['p95_ms']:7.2f} | {row['accuracy']:8.2%} | "
+              f"{row['train_s']:7.0f}{marker}")
+    print("=" * 104)
+
+
+def main():
+    from architectures import ARCHITECTURES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--architectures", nargs='+', default=list(ARCHITECTURES), choices=list(ARCHITECTURES))
+    parser.add_argument("--widths", nargs='+', type=float, default=[1.0, 0.5],
+                        help="width multipliers to try (baseline is only built at 1.0)")
+    parser.add_argument("--processed-root", default='data/processed')
+    parser.add_argument("--output-dir", default='models/architectures')
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--accuracy-floor", type=float, default=0.90)
+    parser.add_argument("--latency-iterations", type=int, default=50)
+    parser.add_argument("--threads", type=int, help="TF intra-op threads (default: TF's choice)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--promote", action='store_true',
+                        help="copy the winner to models/dinosaur_classifier.keras")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    if args.threads:
+        tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from architectures import augment_dataset, build_augmentation, build_model, count_flops
+
+    print("🦖 Comparing architectures...\n")
+    train_ds, test_ds = load_datasets(args.processed_root, args.batch_size)
+    train_ds = augment_dataset(train_ds, build_augmentation(*IMG_SIZE)).prefetch(tf.data.AUTOTUNE)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    candidates = [(name, 1.0) if name == 'baseline' else (name, width)
+                  for name in args.architectures for width in args.widths]
+    report = {}
+    for name, width in dict.fromkeys(candidates):
+        label = name if name == 'baseline' else f"{name}_w{width:g}"
+        print(f"🧠 Training {label}...")
+        tf.keras.utils.set_random_seed(args.seed)
+        model = build_model(name, *IMG_SIZE, width=width)
+        accuracy, epochs, train_seconds = train_candidate(model, train_ds, test_ds, args.epochs)
+        path = os.path.join(args.output_dir, f"{label}.keras")
+        model.save(path)
+        report[label] = {
+            'architecture': name,
+            'width': width,
+            'file': path,
+            'params': model.count_params(),
+            'flops': count_flops(model),
+            'size_mb': os.path.getsize(path) / 1e6,
+            'accuracy': accuracy,
+            'epochs': epochs,
+            'train_s': train_seconds,
+            **measure_serving(path, args.latency_iterations),
+        }
+        del model
+
+    winner = pick_winner(report, args.accuracy_floor)
+    print_report(report, winner)
+    if winner:
+        print(f"⭐ Fastest model with accuracy ≥ {args.accuracy_floor:.0%}: {winner} "
+              f"({report[winner]['p50_ms']:.2f}ms, {report[winner]['size_mb']:.2f} MB)")
+        if args.promote:
+            os.makedirs('models', exist_ok=True)
+            shutil.copy2(report[winner]['file'], 'models/dinosaur_classifier.keras')
+            print("✅ Copied to models/dinosaur_classifier.keras")
+    else:
+        print(f"❌ No model reached {args.accuracy_floor:.0%} validation accuracy")
+
+    report_path = os.path.join(args.output_dir, 'report.json')
+    with open(report_path, 'w') as f:
+        json.dump({'config': vars(args), 'winner': winner, 'models': report}, f, indent=2)
+    print(f"📁 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
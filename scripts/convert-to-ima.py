@@ -1,9 +1,25 @@
+import hashlib
 import pickle
+import sys
 import numpy as np
 from PIL import Image
 import os
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocessing import resize_batch
+from packed_dataset import write_array_source
+
+CIFAR10_CLASSES = [
+    'airplane', 'automobile', 'bird', 'cat', 'deer',
+    'dog', 'frog', 'horse', 'ship', 'truck'
+]
+CIFAR10_BATCHES = [
+    'data_batch_1', 'data_batch_2', 'data_batch_3',
+    'data_batch_4', 'data_batch_5', 'test_batch'
+]
+
 def unpickle(file):
     """Load CIFAR-10 batch file"""
     with open(file, 'rb') as fo:
@@ -173,6 +189,64 @@ def select_objects_from_cifar(cifar_extracted_path, dest_path, images_per_class=
     
     return total_copied
 
+def ingest_cifar10(cifar_path, array_root, images_per_class=40, seed=42,
+                   label='not_dinosaur', name='cifar10', batch_size=256):
+    """
+    Pick a random per-class subset of CIFAR-10 and write it straight into the
+    packed training format (an array source that data_prep.py packs)
+    
+    No intermediate JPEGs: indices are chosen from the label arrays alone,
+    only the chosen rows are reshaped, and the 32×32 → 224×224 upsampling
+    is done a batch at a time with the same Lanczos filter as data prep.
+    
+    Args:
+        cifar_path: Path to folder containing CIFAR-10 batch files
+        array_root: data/raw/arrays folder
+        images_per_class: Number of images per class (default: 40)
+    """
+    rng = np.random.default_rng(seed)
+    
+    print("🖼️  Loading CIFAR-10 batches...\n")
+    batches = []
+    for batch_file in CIFAR10_BATCHES:
+        batch_path = os.path.join(cifar_path, batch_file)
+        if not os.path.exists(batch_path):
+            print(f"⚠️  Skipping {batch_file} - not found")
+            continue
+        batch_data = unpickle(batch_path)
+        batches.append((batch_file, batch_data[b'data'], np.asarray(batch_data[b'labels'])))
+    if not batches:
+        print("⚠️  No CIFAR-10 batch files found")
+        return 0
+    
+    # Select per class on the concatenated labels, before touching any pixels
+    all_labels = np.concatenate([labels for _, _, labels in batches])
+    offsets = np.cumsum([0] + [len(labels) for _, _, labels in batches])
+    selected = []
+    for class_id, class_name in enumerate(CIFAR10_CLASSES):
+        candidates = np.flatnonzero(all_labels == class_id)
+        num_to_select = min(images_per_class, len(candidates))
+        selected.append(rng.choice(candidates, num_to_select, replace=False))
+        print(f"✅ {class_name:12s}: Selected {num_to_select}/{len(candidates)} images")
+    selected = np.sort(np.concatenate(selected))
+    
+    # Gather just the chosen rows: (n, 3072) → (n, 32, 32, 3)
+    batch_ids = np.searchsorted(offsets, selected, side='right') - 1
+    rows = selected - offsets[batch_ids]
+    pixels = np.concatenate([batches[b][1][rows[batch_ids == b]] for b in range(len(batches))])
+    pixels = pixels.reshape(-1, 3, 32, 32).transpose(0, 2, 3, 1)
+    keys = [f"cifar10/{batches[b][0]}/{row:05d}/{CIFAR10_CLASSES[all_labels[i]]}"
+            for b, row, i in zip(batch_ids, rows, selected)]
+    sha256s = [hashlib.sha256(np.ascontiguousarray(img).tobytes()).hexdigest() for img in pixels]
+    
+    upsampled = (resize_batch(pixels[start:start + batch_size])
+                 for start in range(0, len(pixels), batch_size))
+    path = write_array_source(array_root, name, label, keys, sha256s, upsampled)
+    
+    print(f"\n🎉 Total CIFAR-10 images added: {len(keys)}")
+    print(f"📁 Destination: {path}")
+    return len(keys)
+
 def main():
     """Main function"""
     
@@ -180,6 +254,9 @@ def main():
     CIFAR_PATH = "/Users/aryahb/IsItADino/temp_cifar10/cifar-10-batches-py"
     EXTRACT_PATH = "/Users/aryahb/IsItADino/temp_cifar10/extracted"
     DEST_PATH = "/Users/aryahb/IsItADino/is-it-a-dino/data/raw/not_dinosaur"
+    ARRAY_PATH = "/Users/aryahb/IsItADino/is-it-a-dino/data/raw/arrays"
+    # True = old route: every image as a JPEG in EXTRACT_PATH, then copied to DEST_PATH
+    EXPORT_JPEGS = False
     
     print("🦖 CIFAR-10 Object Extractor\n")
     
@@ -196,6 +273,12 @@ def main():
         print("   - temp_cifar10/cifar-10-python/")
         return
     
+    if not EXPORT_JPEGS:
+        # Straight from the pickles into the training dataset format
+        ingest_cifar10(CIFAR_PATH, ARRAY_PATH, images_per_class=40)
+        print("\n📋 Next step: Run 'python scripts/data_prep.py' (CIFAR-10 goes into data/processed/packed)")
+        return
+    
     # Step 1: Extract images from pickle files (only 100 per class)
     print("Step 1: Extracting CIFAR-10 images (100 per class for efficiency)...")
     extract_cifar10_images(CIFAR_PATH, EXTRACT_PATH, max_per_class=100)
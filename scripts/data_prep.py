@@ -1,9 +1,26 @@
+import argparse
+import hashlib
+import io
+import json
 import os
 import shutil
-from PIL import Image
-import numpy as np
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image
+
+# Same decode + resize as the app, so training images match what gets served
+from preprocessing import decode_image, fit_to_model
+from near_duplicates import dhash, group_near_duplicates
+from packed_dataset import array_source_rows, write_packed
+from sampling import read_manifest
+from validate_images import validate_paths
+
 def create_folder_structure():
     """Create necessary folders if they don't exist"""
     folders = [
@@ -16,104 +33,446 @@ def create_folder_structure():
         Path(folder).mkdir(parents=True, exist_ok=True)
     print("✅ Folder structure created")
 
-def resize_and_clean_images(input_folder, output_folder, size=(224, 224)):
-    """Resize all images and remove corrupted ones"""
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    success_count = 0
-    error_count = 0
-    
-    for img_name in os.listdir(input_folder):
-        if img_name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
-            img_path = os.path.join(input_folder, img_name)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+LABELS = ('dinosaur', 'not_dinosaur')
+LINK = 'link'
+ARRAY_ROOT = 'data/raw/arrays'
+
+def prepare_image(img_path, size=(224, 224), known_sha256=None):
+    """Hash, then decode, resize and JPEG-encode one image (runs in a worker process).
+
+    The raw file is read once here for both hash and decode. Returns
+    (sha256, result, phash, error) where result is None when the hash equals
+    known_sha256 (content unchanged), LINK when the raw file already is a
+    size-sized RGB JPEG that can be linked as-is, and the encoded JPEG bytes
+    otherwise. phash is the perceptual hash of the resized image, as 16 hex
+    digits.
+    """
+    try:
+        with open(img_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return None, None, None, str(e)
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == known_sha256:
+        return sha256, None, None, None
+    try:
+        img = Image.open(io.BytesIO(data))
+        if img.format == 'JPEG' and img.mode == 'RGB' and img.size == tuple(size):
+            return sha256, LINK, f"{dhash(img):016x}", None  # dhash fully decodes, so truncation still fails here
+        img = decode_image(io.BytesIO(data), size)  # RGB (handles RGBA, grayscale, etc.), draft-decoded JPEGs
+        img = fit_to_model(img, size)
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=95)
+        return sha256, buffer.getvalue(), f"{dhash(img):016x}", None
+    except Exception as e:
+        return sha256, None, None, str(e)
+
+def assign_split(sha256, test_ratio=0.2):
+    """Deterministic train/test assignment from the content hash.
+
+    The first 32 bits of the hash act as a uniform draw in [0, 1), so a file
+    keeps its split across runs and machines, and adding new files never
+    moves existing ones.
+    """
+    return 'test' if int(sha256[:8], 16) / 2**32 < test_ratio else 'train'
+
+def output_path_for(processed_root, label, split, sha256):
+    return os.path.join(processed_root, split, label, f"{sha256[:16]}.jpg")
+
+def resolve_near_duplicates(entries, arrays, radius=4, test_ratio=0.2, max_group_size=16):
+    """Group near-duplicate images and give every group one split and one keeper per label.
+
+    entries (processed files) and arrays (array-source rows) are updated in
+    place: every member of a group gets the split of the group's smallest
+    content hash, so no group can straddle train/test, and all but one
+    member per label get 'duplicate_of' set so they are left out of the
+    dataset. Groups are merged transitively, so one larger than
+    max_group_size (0 = no cap) is more likely a chain of loosely similar
+    images than copies of one photo: it still shares a split, but nothing
+    in it is dropped. Returns stats: groups, images collapsed, label
+    conflicts, oversized groups and the largest group sizes.
+    """
+    items = [(key, entry) for key, entry in sorted(entries.items()) if entry['error'] is None]
+    items += sorted(arrays.items())
+    by_key = dict(items)
+    if radius < 0:
+        groups = [[i] for i in range(len(items))]
+    else:
+        groups = group_near_duplicates([int(entry['phash'], 16) for _, entry in items], radius)
+
+    group_count = collapsed = conflicts = oversized = 0
+    for group in groups:
+        members = sorted((items[i][1]['sha256'], items[i][0]) for i in group)
+        split = assign_split(members[0][0], test_ratio)
+        keepers = {}
+        for _, key in members:
+            keepers.setdefault(by_key[key]['label'], key)
+        if max_group_size and len(members) > max_group_size:
+            oversized += 1
+            keepers = None
+            print(f"⚠️  Near-duplicate group of {len(members)} images is over --max-group-size "
+                  f"{max_group_size}; keeping all of them (e.g. {', '.join(key for _, key in members[:3])})")
+        for _, key in members:
+            entry = by_key[key]
+            keeper = keepers[entry['label']] if keepers else key
+            entry.update(split=split, group=members[0][0][:16] if len(members) > 1 else None,
+                         duplicate_of=None if keeper == key else keeper)
+        if len(members) > 1:
+            group_count += 1
+        if keepers:
+            collapsed += len(members) - len(keepers)
+            if len(keepers) > 1:
+                conflicts += 1
+                print(f"⚠️  Near-duplicates with different labels: {', '.join(sorted(keepers.values()))}")
+    return {
+        'near_duplicate_groups': group_count,
+        'collapsed': collapsed,
+        'label_conflicts': conflicts,
+        'oversized_groups': oversized,
+        'largest_groups': sorted((len(g) for g in groups if len(g) > 1), reverse=True)[:5],
+    }
+
+def load_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {'config': None, 'files': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_path):
+    """Write the manifest atomically, so an interrupted run never leaves half a file."""
+    tmp = manifest_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, manifest_path)
+
+def scan_raw(raw_root, labels=LABELS):
+    """{'label/name': (path, label, size, mtime_ns)} for every raw image."""
+    found = {}
+    for label in labels:
+        folder = os.path.join(raw_root, label)
+        if not os.path.isdir(folder):
+            print(f"⚠️  {folder} not found, skipping")
+            continue
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    found[f"{label}/{entry.name}"] = (entry.path, label, stat.st_size, stat.st_mtime_ns)
+    return found
+
+def scan_manifests(manifest_root, labels=LABELS):
+    """Same as scan_raw, for the images listed in sampler manifests (read in place).
+
+    Keys are 'label/<manifest name>:<source path>', so the manifest an image
+    came from stays visible in data/processed/manifest.json.
+    """
+    found = {}
+    if not os.path.isdir(manifest_root):
+        return found
+    for filename in sorted(os.listdir(manifest_root)):
+        if not filename.endswith('.jsonl'):
+            continue
+        missing = 0
+        for row in read_manifest(os.path.join(manifest_root, filename)):
+            if row['label'] not in labels:
+                print(f"⚠️  {filename}: unknown label {row['label']!r} for {row['path']}, skipping")
+                continue
             try:
-                img = Image.open(img_path)
-                img = img.convert('RGB')  # Convert to RGB (handles RGBA, grayscale, etc.)
-                img = img.resize(size, Image.Resampling.LANCZOS)
-                
-                # Save with consistent naming
-                output_path = os.path.join(output_folder, f"{success_count:04d}.jpg")
-                img.save(output_path, 'JPEG', quality=95)
-                success_count += 1
-                
-                if success_count % 50 == 0:
-                    print(f"Processed {success_count} images...")
-                    
-            except Exception as e:
-                print(f"❌ Error with {img_name}: {e}")
-                error_count += 1
-    
-    print(f"✅ Processed {success_count} images successfully")
-    if error_count > 0:
-        print(f"⚠️  Skipped {error_count} corrupted images")
-    return success_count
-
-def split_train_test(input_folder, train_folder, test_folder, test_ratio=0.2):
-    """Split images into train and test sets"""
-    images = [f for f in os.listdir(input_folder) if f.endswith('.jpg')]
-    np.random.shuffle(images)
-    
-    split_idx = int(len(images) * (1 - test_ratio))
-    train_images = images[:split_idx]
-    test_images = images[split_idx:]
-    
-    # Copy to train folder
-    for img in train_images:
-        shutil.copy(
-            os.path.join(input_folder, img),
-            os.path.join(train_folder, img)
-        )
-    
-    # Copy to test folder
-    for img in test_images:
-        shutil.copy(
-            os.path.join(input_folder, img),
-            os.path.join(test_folder, img)
-        )
-    
-    print(f"✅ Split: {len(train_images)} train, {len(test_images)} test")
-    return len(train_images), len(test_images)
+                stat = os.stat(row['path'])
+            except OSError:
+                missing += 1
+                continue
+            key = f"{row['label']}/{filename[:-len('.jsonl')]}:{row['path']}"
+            found[key] = (row['path'], row['label'], stat.st_size, stat.st_mtime_ns)
+        if missing:
+            print(f"⚠️  {filename}: {missing} listed images not found, skipping them")
+    return found
+
+def remove_output(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def write_output(path, jpeg_bytes):
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(jpeg_bytes)
+    os.replace(tmp, path)
+
+def reflink(src, dst):
+    """Copy-on-write clone (Btrfs, XFS with reflink); raises OSError if unsupported."""
+    import fcntl
+
+    FICLONE = 0x40049409
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+
+def link_or_copy(src, dst):
+    """Place src at dst without duplicating data where the filesystem allows.
+
+    Tries a hardlink, then a reflink, and only then a real copy. Returns
+    which one was used.
+    """
+    tmp = dst + '.tmp'
+    remove_output(tmp)
+    try:
+        os.link(src, tmp)
+        method = 'hardlink'
+    except OSError:
+        try:
+            reflink(src, tmp)
+            method = 'reflink'
+        except (OSError, ImportError):
+            shutil.copyfile(src, tmp)
+            method = 'copy'
+    os.replace(tmp, dst)
+    return method
+
+def place_output(entry, path, processed_root, size):
+    """Make sure a kept entry's output exists at its (possibly new) split path."""
+    output = output_path_for(processed_root, entry['label'], entry['split'], entry['sha256'])
+    current = os.path.join(processed_root, entry['output']) if entry['output'] else None
+    if not os.path.exists(output):
+        if current and os.path.exists(current):
+            link_or_copy(current, output)
+        else:
+            # Its output was dropped while it was someone's duplicate: rebuild it
+            _, result, _, error = prepare_image(path, size)
+            if error is not None:
+                print(f"❌ Error with {path}: {error}")
+                entry['error'] = error
+                entry['output'] = None
+                return
+            if result == LINK:
+                link_or_copy(path, output)
+            else:
+                write_output(output, result)
+    entry['output'] = os.path.relpath(output, processed_root)
+
+def sync_processed(raw_root='data/raw', processed_root='data/processed', size=(224, 224),
+                   test_ratio=0.2, workers=None, in_flight_per_worker=32, rebuild=False, save_every=500,
+                   dup_radius=4, max_group_size=16, validate=True):
+    """Bring processed_root in line with raw_root, doing work only for what changed.
+
+    The manifest (processed_root/manifest.json) maps every raw file to its
+    size/mtime, content hash, split and processed output. Unchanged files are
+    skipped without even being re-hashed; touched files are re-hashed and only
+    re-processed if their bytes changed; removed files have their output
+    deleted. Outputs are named by content hash, so nothing else gets renamed.
+
+    Raw files are raw_root/<label>/* plus every image listed in the sampler
+    manifests in raw_root/manifests/*.jsonl, which are read where they are.
+
+    Before anything is processed, raw files go through validate_images.py
+    (cached, in parallel); quarantined files are treated as absent.
+
+    Finally every image (including array-source rows in raw_root/arrays) is
+    grouped with its near-duplicates by perceptual hash (within dup_radius
+    bits; -1 turns this off). A group shares one split, and only one member
+    per label keeps an output; the rest are recorded as duplicate_of. Groups
+    over max_group_size are kept whole (see resolve_near_duplicates).
+
+    Processing happens in one streaming pass: each worker reads a raw file
+    once for both hash and decode, the split is decided from the hash, and
+    the result is written directly to its final train/ or test/ path. Raw
+    files that are already model-sized RGB JPEGs are hardlinked (or
+    reflinked) instead of re-encoded. New or changed files are therefore
+    read twice per run, once by validation and once here; unchanged files
+    are read by neither.
+    """
+    manifest_path = os.path.join(processed_root, 'manifest.json')
+    config = {'size': list(size), 'test_ratio': test_ratio}
+    manifest = load_manifest(manifest_path)
+    if rebuild or manifest['config'] != config:
+        if manifest['files']:
+            print("♻️  Settings changed (or --rebuild): reprocessing everything")
+        manifest = {'config': config, 'files': {}}
+    entries = manifest['files']
+
+    raw = scan_raw(raw_root)
+    raw.update(scan_manifests(os.path.join(raw_root, 'manifests')))
+    quarantined = {}
+    if validate:
+        bad = validate_paths([path for path, _, _, _ in raw.values()], workers=workers)
+        quarantined = {key: bad[raw[key][0]] for key in raw if raw[key][0] in bad}
+        for key in sorted(quarantined):
+            print(f"🚫 Quarantined {key}: {quarantined[key]}")
+            del raw[key]
+    stats = {'unchanged': 0, 'new': 0, 'changed': 0, 'removed': 0, 'failed': 0,
+             'written_bytes': 0, 'hardlink': 0, 'reflink': 0, 'copy': 0, 'duplicate': 0,
+             'quarantined': len(quarantined)}
+    arrays = {row[0]: {'label': row[1], 'sha256': row[2], 'phash': row[3]}
+              for row in array_source_rows(os.path.join(raw_root, 'arrays'))}
+
+    # Removed raw files
+    for key in sorted(set(entries) - set(raw)):
+        entries.pop(key)
+        stats['removed'] += 1
+
+    # Only files whose size/mtime moved (or are new) get read at all, plus
+    # entries from before perceptual hashes were recorded
+    pending = [key for key, (_, _, size_bytes, mtime_ns) in sorted(raw.items())
+               if key not in entries
+               or entries[key]['size_bytes'] != size_bytes
+               or entries[key]['mtime_ns'] != mtime_ns
+               or (entries[key]['error'] is None and not entries[key].get('phash'))]
+    print(f"🔎 {len(raw)} raw images, {len(pending)} new or touched")
+
+    def finish(key, sha256, result, phash, error):
+        """Record one worker result and write its output straight to train/ or test/."""
+        path, label, size_bytes, mtime_ns = raw[key]
+        previous = entries.get(key)
+        if error is None and result is None:
+            # Touched, but the bytes are the same: only the stat needs refreshing
+            previous.update(size_bytes=size_bytes, mtime_ns=mtime_ns)
+            return
+        stats['changed' if previous is not None else 'new'] += 1
+        entry = entries[key] = {
+            'sha256': sha256, 'label': label, 'split': None,
+            'size_bytes': size_bytes, 'mtime_ns': mtime_ns,
+            'output': None, 'error': error,
+            'phash': phash, 'group': None, 'duplicate_of': None,
+        }
+        if error is not None:
+            print(f"❌ Error with {key}: {error}")
+            stats['failed'] += 1
+            return
+        entry['split'] = assign_split(sha256, test_ratio)
+        output = output_path_for(processed_root, label, entry['split'], sha256)
+        if os.path.exists(output):
+            # Outputs are content-addressed, so an existing one is already right
+            stats['duplicate'] += 1
+        elif result == LINK:
+            stats[link_or_copy(path, output)] += 1
+        else:
+            write_output(output, result)
+            stats['written_bytes'] += len(result)
+        entry['output'] = os.path.relpath(output, processed_root)
+
+    started = time.perf_counter()
+    max_in_flight = (workers or os.cpu_count() or 1) * in_flight_per_worker
+    with ProcessPoolExecutor(workers) as pool:
+        # Stream: a bounded number of images in flight, each result written as
+        # soon as it arrives (in order, so runs are reproducible)
+        in_flight = deque()
+        keys = iter(pending)
+        done = 0
+        while True:
+            for key in keys:
+                known = entries[key]['sha256'] if entries.get(key, {}).get('phash') else None
+                in_flight.append((key, pool.submit(prepare_image, raw[key][0], size, known)))
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+            key, future = in_flight.popleft()
+            finish(key, *future.result())
+            done += 1
+            if done % 50 == 0:
+                rate = done / (time.perf_counter() - started)
+                print(f"Processed {done}/{len(pending)} images... ({rate:.1f} img/s)")
+            if done % save_every == 0:
+                save_manifest(manifest, manifest_path)
+    stats['unchanged'] = len(raw) - stats['new'] - stats['changed']
+
+    # Near-duplicates: one split per group, one kept image per label
+    started_dedup = time.perf_counter()
+    stats.update(resolve_near_duplicates(entries, arrays, dup_radius, test_ratio, max_group_size))
+    for key, entry in entries.items():
+        if entry['error'] is not None:
+            continue
+        if entry['duplicate_of']:
+            entry['output'] = None
+        else:
+            place_output(entry, raw[key][0], processed_root, size)
+    stats['dedup_seconds'] = time.perf_counter() - started_dedup
+    manifest['arrays'] = arrays
+
+    # Anything on disk that no entry points at is stale (removed/changed raw
+    # files, or leftovers from before the manifest existed)
+    referenced = {entry['output'] for entry in entries.values() if entry['output']}
+    for split in ('train', 'test'):
+        for label in LABELS:
+            folder = os.path.join(processed_root, split, label)
+            for name in os.listdir(folder):
+                relative = os.path.join(split, label, name)
+                if name.endswith('.jpg') and relative not in referenced:
+                    remove_output(os.path.join(folder, name))
+
+    save_manifest(manifest, manifest_path)
+    stats['seconds'] = time.perf_counter() - started
+    return manifest, stats
+
+def print_summary(manifest, stats):
+    # Byte-identical raw files share one output, so count outputs rather than entries
+    outputs = {(e['split'], e['label'], e['output']) for e in manifest['files'].values() if e['output']}
+    counts = {}
+    for split, label, _ in outputs:
+        counts[(split, label)] = counts.get((split, label), 0) + 1
+    print(f"\n✅ Preprocessing complete in {stats['seconds']:.1f}s!")
+    print(f"New: {stats['new']} · changed: {stats['changed']} · removed: {stats['removed']} · "
+          f"unchanged: {stats['unchanged']} · failed: {stats['failed']} · quarantined: {stats['quarantined']}")
+    print(f"Wrote {stats['written_bytes'] / 1e6:.1f} MB · linked {stats['hardlink']} (hardlink) "
+          f"+ {stats['reflink']} (reflink) · copied {stats['copy']} · deduplicated {stats['duplicate']}")
+    print(f"Near-duplicates: {stats['near_duplicate_groups']} groups, {stats['collapsed']} images collapsed, "
+          f"{stats['label_conflicts']} label conflicts ({stats['dedup_seconds']:.1f}s)")
+    if stats['largest_groups']:
+        print(f"Largest near-duplicate groups: {', '.join(map(str, stats['largest_groups']))} images "
+              f"({stats['oversized_groups']} over the cap, kept whole)")
+    for label in LABELS:
+        print(f"Total {label} images: {counts.get(('train', label), 0)} train, "
+              f"{counts.get(('test', label), 0)} test")
 
 def main():
+    parser = argparse.ArgumentParser(description="Resize, clean and split data/raw into data/processed")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for hashing and resizing (default: one per CPU core)")
+    parser.add_argument("--in-flight-per-worker", type=int, default=32,
+                        help="images submitted ahead per worker process (bounds memory held by pending results)")
+    parser.add_argument("--test-ratio", type=float, default=0.2)
+    parser.add_argument("--rebuild", action='store_true',
+                        help="ignore the manifest and reprocess every image")
+    parser.add_argument("--skip-validation", action='store_true',
+                        help="don't run the validate_images.py pass over data/raw first")
+    parser.add_argument("--dup-radius", type=int, default=4,
+                        help="max perceptual-hash bit difference for near-duplicates (-1 = off)")
+    parser.add_argument("--max-group-size", type=int, default=16,
+                        help="near-duplicate groups larger than this are kept whole instead of collapsed "
+                             "(matches chain transitively; 0 = no cap)")
+    parser.add_argument("--no-pack", action='store_true',
+                        help="skip writing the packed uint8 dataset (data/processed/packed)")
+    parser.add_argument("--shard-size", type=int, default=4096,
+                        help="images per packed shard")
+    args = parser.parse_args()
+
     print("🦖 Starting data preprocessing...")
     
     # Create folder structure
     create_folder_structure()
     
-    # Process dinosaur images
-    print("\n📁 Processing dinosaur images...")
-    temp_dino = 'data/processed/temp_dinosaur'
-    os.makedirs(temp_dino, exist_ok=True)
-    dino_count = resize_and_clean_images('data/raw/dinosaur', temp_dino)
-    
-    # Split dinosaur images
-    split_train_test(
-        temp_dino,
-        'data/processed/train/dinosaur',
-        'data/processed/test/dinosaur'
-    )
-    
-    # Process not_dinosaur images
-    print("\n📁 Processing not_dinosaur images...")
-    temp_not = 'data/processed/temp_not_dinosaur'
-    os.makedirs(temp_not, exist_ok=True)
-    not_dino_count = resize_and_clean_images('data/raw/not_dinosaur', temp_not)
-    
-    # Split not_dinosaur images
-    split_train_test(
-        temp_not,
-        'data/processed/train/not_dinosaur',
-        'data/processed/test/not_dinosaur'
-    )
-    
-    # Clean up temp folders
-    shutil.rmtree(temp_dino)
-    shutil.rmtree(temp_not)
-    
-    print(f"\n✅ Preprocessing complete!")
-    print(f"Total dinosaur images: {dino_count}")
-    print(f"Total not_dinosaur images: {not_dino_count}")
+    manifest, stats = sync_processed(test_ratio=args.test_ratio, workers=args.workers,
+                                     in_flight_per_worker=args.in_flight_per_worker, rebuild=args.rebuild,
+                                     dup_radius=args.dup_radius, max_group_size=args.max_group_size,
+                                     validate=not args.skip_validation)
+    print_summary(manifest, stats)
+    if not args.no_pack:
+        # Array sources (e.g. CIFAR-10 from convert-to-ima.py) only exist in
+        # packed form; their split and duplicate status come from the manifest
+        array_rows = {'train': [], 'test': []}
+        for source, row in manifest['arrays'].items():
+            if not row['duplicate_of']:
+                array_rows[row['split']].append((source, row['label'], row['sha256']))
+        if array_rows['train'] or array_rows['test']:
+            print(f"🧮 {len(array_rows['train']) + len(array_rows['test'])} images from array sources in {ARRAY_ROOT}")
+        write_packed('data/processed', manifest, LABELS, shard_size=args.shard_size, workers=args.workers,
+                     array_root=ARRAY_ROOT, array_rows=array_rows)
     print("\nReady for training! 🚀")
 
 if __name__ == "__main__":
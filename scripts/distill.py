@@ -0,0 +1,193 @@
+"""
+Knowledge distillation: train a small student to mimic a bigger teacher.
+
+    python scripts/distill.py --teacher models/dinosaur_classifier_transfer.keras
+    python scripts/distill.py --teacher ... --student gap --width 0.5 --alpha 0.3 --temperature 4
+
+The teacher runs over every image in data prep's manifest once. Its
+predictions are stored as soft labels next to the processed dataset
+(data/processed/soft_labels/, keyed by image sha256 and by the teacher
+file), so later runs with the same teacher only score new images. The
+student (any architecture from architectures.py) trains on the packed
+dataset against
+
+    alpha × BCE(hard label, student) + (1 - alpha) × T² × BCE(teacher_T, student_T)
+
+where _T means the probability with its logit divided by the temperature T.
+The student keeps the served model's interface (224×224×3 0-255 input,
+sigmoid output, same class order), so the output .keras file is a drop-in
+for models/dinosaur_classifier.keras. The report compares teacher and
+student accuracy, latency, file size and memory on CPU.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embedding_store import EmbeddingStore
+from export_tflite import current_rss_mb, evaluate, list_images
+from packed_dataset import packed_dataset, read_index
+from prediction_cache import file_fingerprint
+from preprocessing import IMG_SIZE
+from train_transfer import embed_missing, manifest_rows
+
+SOFT_LABEL_ROOT = 'data/processed/soft_labels'
+
+
+def teacher_soft_labels(teacher_path, rows, processed_root, array_root, root=SOFT_LABEL_ROOT, workers=None):
+    """EmbeddingStore of teacher probabilities (dim 1) for every row, computing only the missing ones."""
+    from inference import load_keras_model
+
+    fingerprint = hashlib.sha256(f"{file_fingerprint(teacher_path)}:{IMG_SIZE}".encode()).hexdigest()
+    store = EmbeddingStore('teacher', fingerprint, root)
+    if store.missing(row[2] for row in rows):
+        embed_missing(store, load_keras_model(teacher_path), rows, processed_root, array_root, workers=workers)
+    else:
+        print(f"🧑‍🏫 All {len(store)} teacher soft labels cached")
+    return store
+
+
+def soft_labels_for(split_dir, store, sha256_by_source):
+    """Teacher probabilities in the packed split's row order."""
+    sources = read_index(split_dir)['sources']
+    missing = [source for source in sources if source not in sha256_by_source]
+    if missing:
+        raise ValueError(f"{len(missing)} packed rows are not in the manifest (e.g. {missing[0]}); "
+                         "re-run data_prep.py")
+    return store.get([sha256_by_source[source] for source in sources])[:, 0]
+
+
+def distillation_loss(alpha=0.5, temperature=2.0):
+    """Loss on [hard label, teacher probability] targets against the student's sigmoid output."""
+    import tensorflow as tf
+
+    def logit(p):
+        p = tf.clip_by_value(p, 1e-7, 1 - 1e-7)
+        return tf.math.log(p) - tf.math.log1p(-p)
+
+    def loss(y_true, y_pred):
+        hard, teacher = y_true[:, :1], y_true[:, 1:]
+        hard_loss = tf.keras.losses.binary_crossentropy(hard, y_pred)
+        soft_loss = tf.keras.losses.binary_crossentropy(tf.sigmoid(logit(teacher) / temperature),
+                                                        tf.sigmoid(logit(y_pred) / temperature))
+        return alpha * hard_loss + (1 - alpha) * temperature ** 2 * soft_loss
+    return loss
+
+
+def hard_accuracy(y_true, y_pred):
+    """Accuracy against the hard label column only."""
+    import tensorflow as tf
+
+    return tf.keras.metrics.binary_accuracy(y_true[:, :1], y_pred)
+
+
+def compare_models(paths, test_dir, latency_iterations=50):
+    """Accuracy, latency, file size, params and memory of each saved model, loaded as app.py loads it."""
+    from inference import InferenceEngine, load_keras_model
+
+    test_images = list_images(test_dir) if os.path.isdir(test_dir) else []
+    report = {}
+    for name, path in paths.items():
+        rss_before = current_rss_mb()
+        model = load_keras_model(path)
+        engine = InferenceEngine(model, batch_buckets=(1,))
+        report[name] = {
+            'file': path,
+            'params': model.count_params(),
+            'size_mb': os.path.getsize(path) / 1e6,
+            'rss_delta_mb': current_rss_mb() - rss_before,
+            **evaluate(engine, test_images, latency_iterations),
+        }
+        del engine, model
+    return report
+
+
+def print_report(report):
+    teacher, student = report['teacher'], report['student']
+    print("\n" + "=" * 86)
+    print("📊 TEACHER VS STUDENT")
+    print("=" * 86)
+    print(f"{'model':8s} | {'params':>10s} | {'accuracy':>8s} | {'p50 ms':>7s} | {'p99 ms':>7s} | "
+          f"{'size MB':>7s} | {'RSS Δ MB':>8s}")
+    for name, row in report.items():
+        accuracy = f"{row['accuracy']:.2%}" if row['accuracy'] is not None else 'n/a'
+        print(f"{name:8s} | {row['params']:10,d} | {accuracy:>8s} | {row['latency_ms_p50']:7.2f} | "
+              f"{row['latency_ms_p99']:7.2f} | {row['size_mb']:7.2f} | {row['rss_delta_mb']:8.1f}")
+    print("=" * 86)
+    if teacher['accuracy'] is not None:
+        print(f"🎯 Accuracy gap: {(teacher['accuracy'] - student['accuracy']) * 100:+.2f} points")
+    print(f"⚡ {teacher['latency_ms_p50'] / student['latency_ms_p50']:.1f}× faster · "
+          f"{teacher['size_mb'] / student['size_mb']:.1f}× smaller · "
+          f"{teacher['rss_delta_mb'] - student['rss_delta_mb']:.0f} MB less memory")
+
+
+def main():
+    from architectures import ARCHITECTURES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teacher", required=True, help="trained teacher .keras model")
+    parser.add_argument("--student", default='separable', choices=list(ARCHITECTURES))
+    parser.add_argument("--width", type=float, default=0.5, help="student width multiplier")
+    parser.add_argument("--alpha", type=float, default=0.5, help="weight of the hard-label loss")
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--processed-root", default='data/processed')
+    parser.add_argument("--array-root", default='data/raw/arrays')
+    parser.add_argument("--workers", type=int, default=None, help="JPEG decode processes")
+    parser.add_argument("--output", default='models/dinosaur_classifier_student.keras')
+    args = parser.parse_args()
+
+    packed_dir = os.path.join(args.processed_root, 'packed')
+    if not os.path.exists(os.path.join(packed_dir, 'train', 'index.json')):
+        sys.exit(f"❌ No packed dataset at {packed_dir}; run data_prep.py first")
+
+    import tensorflow as tf
+
+    from architectures import augment_dataset, build_augmentation, build_model
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    print(f"🦖 Distilling {args.teacher} into {args.student} (width {args.width})...\n")
+    with open(os.path.join(args.processed_root, 'manifest.json')) as f:
+        rows = manifest_rows(json.load(f))
+    store = teacher_soft_labels(args.teacher, rows, args.processed_root, args.array_root, workers=args.workers)
+    sha256_by_source = {source: sha256 for source, _, sha256, _ in rows}
+
+    train_dir, test_dir = os.path.join(packed_dir, 'train'), os.path.join(packed_dir, 'test')
+    train_ds = packed_dataset(train_dir, args.batch_size, shuffle=True, seed=123,
+                              soft_labels=soft_labels_for(train_dir, store, sha256_by_source))
+    test_ds = packed_dataset(test_dir, args.batch_size,
+                             soft_labels=soft_labels_for(test_dir, store, sha256_by_source))
+    train_ds = augment_dataset(train_ds, build_augmentation(*IMG_SIZE)).prefetch(tf.data.AUTOTUNE)
+
+    tf.keras.utils.set_random_seed(42)
+    student = build_model(args.student, *IMG_SIZE, width=args.width)
+    student.compile(optimizer='adam', loss=distillation_loss(args.alpha, args.temperature),
+                    metrics=[hard_accuracy])
+    student.fit(train_ds, validation_data=test_ds, epochs=args.epochs, verbose=2,
+                callbacks=[EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)])
+
+    # Saved uncompiled: the distillation loss is training-only and app.py loads with compile=False
+    student.compile()
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    student.save(args.output)
+    print(f"✅ Saved {args.output}")
+
+    report = compare_models({'teacher': args.teacher, 'student': args.output},
+                            os.path.join(args.processed_root, 'test'))
+    print_report(report)
+    report_path = os.path.splitext(args.output)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump({'config': vars(args), 'models': report}, f, indent=2)
+    print(f"📁 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
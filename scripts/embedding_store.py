@@ -0,0 +1,70 @@
+"""
+Memory-mapped store of backbone embeddings, keyed by image content hash.
+
+    data/embeddings/<backbone>-<fingerprint>/index.json
+    data/embeddings/<backbone>-<fingerprint>/embeddings-00000.npy   (n, dim) float32
+
+The fingerprint covers the backbone's weights file and input size, so new
+weights get a fresh store instead of stale vectors. Chunks are append-only:
+adding embeddings writes a new chunk and then the index, so an interrupted
+run keeps everything up to its last finished chunk, and a dataset that
+grows only needs embeddings for its new images.
+"""
+import json
+import os
+
+import numpy as np
+
+EMBEDDING_ROOT = 'data/embeddings'
+
+
+class EmbeddingStore:
+    def __init__(self, backbone, fingerprint, root=EMBEDDING_ROOT):
+        self.folder = os.path.join(root, f"{backbone}-{fingerprint[:16]}")
+        self.index_path = os.path.join(self.folder, 'index.json')
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'backbone': backbone, 'fingerprint': fingerprint, 'dim': None, 'chunks': [], 'keys': {}}
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self.index['keys'])
+
+    def __contains__(self, key):
+        return key in self.index['keys']
+
+    def missing(self, keys):
+        """Keys without an embedding yet (first occurrence order, no repeats)."""
+        return [key for key in dict.fromkeys(keys) if key not in self.index['keys']]
+
+    def add(self, keys, vectors):
+        """Append one chunk of (len(keys), dim) embeddings."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.index['dim'] is None:
+            self.index['dim'] = int(vectors.shape[1])
+        os.makedirs(self.folder, exist_ok=True)
+        name = f"embeddings-{len(self.index['chunks']):05d}.npy"
+        with open(os.path.join(self.folder, name + '.tmp'), 'wb') as f:
+            np.save(f, vectors)
+        os.replace(os.path.join(self.folder, name + '.tmp'), os.path.join(self.folder, name))
+
+        chunk = len(self.index['chunks'])
+        self.index['chunks'].append(name)
+        for row, key in enumerate(keys):
+            self.index['keys'][key] = [chunk, row]
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def get(self, keys):
+        """(len(keys), dim) float32 array of stored embeddings, gathered from the memory maps."""
+        out = np.empty((len(keys), self.index['dim'] or 0), dtype=np.float32)
+        for i, key in enumerate(keys):
+            chunk, row = self.index['keys'][key]
+            if chunk not in self._chunks:
+                self._chunks[chunk] = np.load(os.path.join(self.folder, self.index['chunks'][chunk]), mmap_mode='r')
+            out[i] = self._chunks[chunk][row]
+        return out
@@ -0,0 +1,186 @@
+"""
+Export dinosaur_classifier.keras to TFLite (float32, float16 and int8
+post-training quantized) and write a report comparing accuracy, latency
+and memory for every backend.
+
+    python scripts/export_tflite.py --model models/dinosaur_classifier.keras
+
+Int8 calibration uses a random sample of data/processed/train. The exported
+files keep float32 inputs/outputs, so app.py can swap them in with
+DINO_BACKEND=tflite DINO_MODEL_PATH=models/dinosaur_classifier_<variant>.tflite.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inference import IMG_SIZE, InferenceEngine, TFLiteEngine, load_keras_model
+from preprocessing import load_image_for_model
+
+VARIANTS = ('float32', 'float16', 'int8')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(folder):
+    """(path, label) pairs with labels in sorted class-folder order, like image_dataset_from_directory."""
+    class_names = sorted(d.name for d in Path(folder).iterdir() if d.is_dir())
+    return [
+        (path, label)
+        for label, class_name in enumerate(class_names)
+        for path in sorted((Path(folder) / class_name).iterdir())
+        if path.suffix.lower() in IMAGE_EXTENSIONS
+    ]
+
+
+def representative_dataset(train_dir, num_samples=200, seed=42):
+    """Calibration generator for int8 quantization: a seeded random sample of training images."""
+    images = list_images(train_dir)
+    sample = random.Random(seed).sample(images, min(num_samples, len(images)))
+
+    def generator():
+        for path, _ in sample:
+            yield [load_image_for_model(path)]
+
+    return generator
+
+
+def convert(model, variant, train_dir=None, num_samples=200):
+    """Convert a loaded Keras model to TFLite bytes for one variant."""
+    import tensorflow as tf
+
+    # from_keras_model captures the model's variables (a concrete function of
+    # model(x) does not under Keras 3) and keeps the batch dimension dynamic,
+    # so the interpreter can be resized for batched calls
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if variant == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        if train_dir is None or not os.path.exists(train_dir):
+            raise FileNotFoundError(f"int8 calibration needs training images, not found at {train_dir}")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(train_dir, num_samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif variant != 'float32':
+        raise ValueError(f"Unknown variant {variant!r} (expected one of {VARIANTS})")
+
+    return converter.convert()
+
+
+def export_tflite(model_path, output_dir='models', variants=VARIANTS, train_dir=None, num_samples=200):
+    """Write models/<name>_<variant>.tflite for each variant; returns {variant: path}."""
+    model = load_keras_model(model_path)
+    os.makedirs(output_dir, exist_ok=True)
+    stem = Path(model_path).stem
+
+    paths = {}
+    for variant in variants:
+        print(f"📦 Converting {variant}...")
+        output_path = os.path.join(output_dir, f"{stem}_{variant}.tflite")
+        with open(output_path, 'wb') as f:
+            f.write(convert(model, variant, train_dir, num_samples))
+        paths[variant] = output_path
+        print(f"✅ {variant:8s} → {output_path} ({os.path.getsize(output_path) / 1e6:.1f} MB)")
+    return paths
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (Linux; 0 elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def evaluate(engine, test_images, latency_iterations=50):
+    """Accuracy on the test images plus single-image latency of engine.classify()."""
+    correct = 0
+    for path, label in test_images:
+        correct += int((engine.classify(load_image_for_model(path))[0] > 0.5) == label)
+
+    sample = np.random.rand(1, *IMG_SIZE, 3).astype(np.float32) * 255
+    latencies = []
+    for _ in range(latency_iterations):
+        start = time.perf_counter()
+        engine.classify(sample)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'accuracy': correct / len(test_images) if test_images else None,
+        'latency_ms_p50': float(np.percentile(latencies, 50)),
+        'latency_ms_p99': float(np.percentile(latencies, 99)),
+    }
+
+
+def build_report(model_path, tflite_paths, test_dir=None, threads=1):
+    """Compare the Keras engine and every TFLite export on accuracy, latency, size and memory."""
+    test_images = list_images(test_dir) if test_dir and os.path.exists(test_dir) else []
+    if not test_images:
+        print(f"⚠️  No test images at {test_dir}, reporting latency and memory only")
+
+    candidates = {'keras': lambda: InferenceEngine(load_keras_model(model_path), batch_buckets=(1,))}
+    for variant, path in tflite_paths.items():
+        candidates[f"tflite_{variant}"] = lambda path=path: TFLiteEngine(path, num_threads=threads)
+    files = {'keras': model_path, **{f"tflite_{v}": p for v, p in tflite_paths.items()}}
+
+    report = {}
+    for name, make_engine in candidates.items():
+        rss_before = current_rss_mb()
+        engine = make_engine()
+        rss_after = current_rss_mb()
+        report[name] = {
+            'file': files[name],
+            'size_mb': os.path.getsize(files[name]) / 1e6,
+            'rss_delta_mb': rss_after - rss_before,
+            **evaluate(engine, test_images),
+        }
+        del engine
+    return report
+
+
+def print_report(report):
+    print("\n" + "=" * 86)
+    print("📊 BACKEND COMPARISON")
+    print("=" * 86)
+    print(f"{'backend':16s} | {'accuracy':>8s} | {'p50 ms':>7s} | {'p99 ms':>7s} | {'size MB':>7s} | {'RSS Δ MB':>8s}")
+    for name, row in report.items():
+        accuracy = f"{row['accuracy']:.2%}" if row['accuracy'] is not None else 'n/a'
+        print(f"{name:16s} | {accuracy:>8s} | {row['latency_ms_p50']:7.2f} | {row['latency_ms_p99']:7.2f} "
+              f"| {row['size_mb']:7.1f} | {row['rss_delta_mb']:8.1f}")
+    print("=" * 86)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default='models/dinosaur_classifier.keras')
+    parser.add_argument("--output-dir", default='models')
+    parser.add_argument("--variants", nargs='+', default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--train-dir", default='data/processed/train')
+    parser.add_argument("--test-dir", default='data/processed/test')
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1, help="TFLite interpreter threads for the report")
+    args = parser.parse_args()
+
+    print("🦖 Exporting TFLite models...\n")
+    paths = export_tflite(args.model, args.output_dir, args.variants, args.train_dir, args.calibration_samples)
+
+    report = build_report(args.model, paths, args.test_dir, args.threads)
+    print_report(report)
+
+    report_path = os.path.join(args.output_dir, 'tflite_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📁 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
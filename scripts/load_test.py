@@ -0,0 +1,271 @@
+"""
+Concurrent-user load test for the dinosaur app's inference path.
+
+Simulates N concurrent sessions uploading a mix of image sizes and reports
+latency percentiles, throughput, error rate and memory over time. Runs fully
+locally against a stand-in model (randomly initialized training architecture
+unless --model is given); no network needed.
+
+Targets:
+  app      what one Streamlit replica does per upload: draft decode, preprocess,
+           engine.classify() with batch size 1, thumbnail (the default)
+  batcher  the same uploads funnelled through serve.py's in-process MicroBatcher
+  http     a running serve.py (--url), e.g. to load-test another machine's replica
+
+    python scripts/load_test.py --sessions 1 2 4 8 16 --duration 20 --p99-budget-ms 500
+    python scripts/load_test.py --sessions 8 --rate 20 --mix 640x480:0.6,4032x3024:0.4
+
+--rate is total Poisson arrivals/sec (open loop; latency counts time spent
+waiting for a free session). Without it each session uploads back to back
+with --think-time between uploads.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmark_suite import encode, synthetic_image
+from inference import BACKEND, DEFAULT_MODEL_PATHS, InferenceEngine, load_engine
+from preprocessing import IMG_SIZE, decode_image, preprocess_image
+from serve import MicroBatcher, predict_remote
+
+# Mirrors app.py's single-photo path
+THUMBNAIL_SIZE = (512, 512)
+
+
+def parse_mix(mix):
+    """'640x480:0.5,4032x3024:0.5' → [('640x480', 0.5), ('4032x3024', 0.5)]"""
+    pairs = [item.split(':') for item in mix.split(',')]
+    return [(resolution, float(weight)) for resolution, weight in pairs]
+
+
+def build_uploads(mix, variants_per_size=4):
+    """JPEG bytes per resolution (a few seeds each so nothing is trivially identical)."""
+    uploads = {}
+    for resolution, _ in mix:
+        width, height = (int(v) for v in resolution.split('x'))
+        uploads[resolution] = [encode(synthetic_image(width, height, seed), 'jpeg')
+                               for seed in range(variants_per_size)]
+    return uploads
+
+
+def current_rss_mb(pid='self'):
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def make_stand_in_engine(args):
+    if args.model:
+        return load_engine(args.model, args.backend)
+    import tensorflow as tf
+    from architectures import DEFAULT_ARCHITECTURE, DEFAULT_WIDTH, build_model
+
+    tf.keras.utils.set_random_seed(42)
+    return InferenceEngine(build_model(DEFAULT_ARCHITECTURE, *IMG_SIZE, width=DEFAULT_WIDTH))
+
+
+def make_request_fn(args, engine):
+    """A callable(image_bytes) doing one upload's worth of work against the chosen target."""
+    if args.target == 'http':
+        return lambda image_bytes: predict_remote(args.url, image_bytes)
+
+    if args.target == 'batcher':
+        batcher = MicroBatcher(engine, args.max_batch_size, args.max_wait_ms)
+
+        def via_batcher(image_bytes):
+            img_array = preprocess_image(decode_image(io.BytesIO(image_bytes)))
+            return batcher.predict(img_array, timeout=60)
+        return via_batcher
+
+    def like_app(image_bytes):
+        image = decode_image(io.BytesIO(image_bytes))
+        score = float(engine.classify(preprocess_image(image))[0])
+        preview = decode_image(io.BytesIO(image_bytes), THUMBNAIL_SIZE)
+        preview.thumbnail(THUMBNAIL_SIZE)
+        return score
+    return like_app
+
+
+class MemorySampler:
+    """Samples RSS (this process, or --server-pid for http) every interval seconds."""
+
+    def __init__(self, pid='self', interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            self.samples.append((time.perf_counter() - started, current_rss_mb(self.pid)))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_level(request_fn, uploads, mix, sessions, duration, rate, think_time, seed, memory_pid):
+    """Drive `sessions` concurrent users for `duration` seconds; returns the raw records."""
+    rng = random.Random(seed)
+    resolutions = [resolution for resolution, _ in mix]
+    weights = [weight for _, weight in mix]
+    records = []
+    lock = threading.Lock()
+
+    def one_upload(scheduled_at, resolution, image_bytes):
+        ok, error = True, None
+        try:
+            request_fn(image_bytes)
+        except Exception as e:
+            ok, error = False, str(e)
+        finished = time.perf_counter()
+        with lock:
+            records.append({
+                'resolution': resolution,
+                'latency_s': finished - scheduled_at,
+                'finished_s': finished - started,
+                'ok': ok,
+                'error': error,
+            })
+
+    def pick():
+        resolution = rng.choices(resolutions, weights)[0]
+        return resolution, rng.choice(uploads[resolution])
+
+    started = time.perf_counter()
+    deadline = started + duration
+    with MemorySampler(memory_pid) as memory:
+        if rate:
+            # Open loop: arrivals don't wait for earlier uploads to finish
+            with ThreadPoolExecutor(sessions) as pool:
+                next_arrival = started
+                while next_arrival < deadline:
+                    time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                    pool.submit(one_upload, next_arrival, *pick())
+                    next_arrival += rng.expovariate(rate)
+        else:
+            def session_loop(session_seed):
+                session_rng = random.Random(session_seed)
+                while time.perf_counter() < deadline:
+                    with lock:
+                        resolution, image_bytes = pick()
+                    one_upload(time.perf_counter(), resolution, image_bytes)
+                    if think_time:
+                        time.sleep(session_rng.expovariate(1 / think_time))
+
+            threads = [threading.Thread(target=session_loop, args=(seed + i,)) for i in range(sessions)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    elapsed = time.perf_counter() - started
+    return records, memory.samples, elapsed
+
+
+def summarize(records, memory_samples, elapsed, sessions):
+    latencies = np.array([r['latency_s'] for r in records if r['ok']]) * 1000
+    errors = sum(1 for r in records if not r['ok'])
+    rss = [mb for _, mb in memory_samples]
+    summary = {
+        'sessions': sessions,
+        'requests': len(records),
+        'errors': errors,
+        'error_rate': errors / len(records) if records else 0.0,
+        'throughput_per_s': (len(records) - errors) / elapsed if elapsed else 0.0,
+        'rss_mb_start': rss[0] if rss else None,
+        'rss_mb_peak': max(rss) if rss else None,
+        'rss_mb_end': rss[-1] if rss else None,
+    }
+    for q in (50, 90, 95, 99):
+        summary[f'p{q}_ms'] = float(np.percentile(latencies, q)) if len(latencies) else None
+    summary['max_ms'] = float(latencies.max()) if len(latencies) else None
+    return summary
+
+
+def print_table(summaries, p99_budget_ms=None):
+    print("\n" + "=" * 92)
+    print("📊 LOAD TEST RESULTS")
+    print("=" * 92)
+    print(f"{'sessions':>8s} | {'req':>6s} | {'req/s':>7s} | {'p50 ms':>8s} | {'p95 ms':>8s} | "
+          f"{'p99 ms':>8s} | {'errors':>6s} | {'peak RSS MB':>11s}")
+    for s in summaries:
+        fmt = lambda v: f"{v:8.1f}" if v is not None else f"{'n/a':>8s}"
+        print(f"{s['sessions']:8d} | {s['requests']:6d} | {s['throughput_per_s']:7.1f} | {fmt(s['p50_ms'])} | "
+              f"{fmt(s['p95_ms'])} | {fmt(s['p99_ms'])} | {s['error_rate']:6.1%} | {s['rss_mb_peak'] or 0:11.0f}")
+    print("=" * 92)
+    if p99_budget_ms:
+        within = [s['sessions'] for s in summaries
+                  if s['p99_ms'] is not None and s['p99_ms'] <= p99_budget_ms and not s['errors']]
+        if within:
+            print(f"✅ Up to {max(within)} concurrent sessions stay within p99 ≤ {p99_budget_ms:.0f}ms")
+        else:
+            print(f"❌ No tested level stays within p99 ≤ {p99_budget_ms:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default='app', choices=['app', 'batcher', 'http'])
+    parser.add_argument("--url", default='http://127.0.0.1:8000', help="serve.py URL for --target http")
+    parser.add_argument("--server-pid", help="pid of the serve.py process to sample memory from (http)")
+    parser.add_argument("--backend", default=BACKEND, choices=sorted(DEFAULT_MODEL_PATHS))
+    parser.add_argument("--model", help="model file (default: randomly initialized stand-in)")
+    parser.add_argument("--sessions", nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--rate", type=float, default=0.0, help="total arrivals/sec (0 = closed loop)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between a session's uploads")
+    parser.add_argument("--mix", default='640x480:0.4,1920x1080:0.3,4032x3024:0.3')
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--p99-budget-ms", type=float)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write summaries + raw records + memory series as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    print(f"🦖 Load test: target={args.target} · mix={args.mix}")
+    print("🖼️  Generating synthetic uploads...")
+    uploads = build_uploads(mix)
+
+    engine = None if args.target == 'http' else make_stand_in_engine(args)
+    request_fn = make_request_fn(args, engine)
+    memory_pid = args.server_pid if args.target == 'http' and args.server_pid else 'self'
+
+    summaries, runs = [], []
+    for sessions in args.sessions:
+        print(f"🚀 {sessions} concurrent session(s) for {args.duration:.0f}s...")
+        records, memory, elapsed = run_level(request_fn, uploads, mix, sessions, args.duration,
+                                             args.rate, args.think_time, args.seed, memory_pid)
+        summary = summarize(records, memory, elapsed, sessions)
+        summaries.append(summary)
+        runs.append({'summary': summary, 'records': records, 'memory_mb': memory})
+
+    print_table(summaries, args.p99_budget_ms)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'runs': runs}, f, indent=2)
+        print(f"📁 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
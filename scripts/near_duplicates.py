@@ -0,0 +1,89 @@
+"""
+Near-duplicate detection for data prep.
+
+Every image gets a 64-bit difference hash (dHash): shrink to 9×8 grayscale
+and record whether each pixel is brighter than its right neighbour.
+Re-encodes, resizes, small crops and colour tweaks of the same photo land
+within a few bits of each other.
+
+Grouping uses multi-index hashing: the 64 bits are cut into radius + 1
+bands, and by pigeonhole any two hashes within `radius` bits agree exactly
+on at least one band. So for each band the hashes are bucketed by that
+band's value, and real Hamming distances are only computed (vectorized)
+between hashes sharing a bucket, never across all n² pairs. Matches are
+merged with union-find into duplicate groups. Merging is transitive, so a
+chain of near matches can join images that are far apart; data prep caps
+how large a group it will collapse.
+"""
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(img, hash_size=8):
+    """64-bit difference hash of a PIL image (as an int)."""
+    small = np.asarray(img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR),
+                       dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1)
+
+
+def band_masks(radius):
+    """(shift, mask) for each of the radius + 1 bands of a 64-bit hash."""
+    bands = radius + 1
+    edges = [round(i * HASH_BITS / bands) for i in range(bands + 1)]
+    return [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+
+
+def near_pairs(hashes, radius=4, block=1024):
+    """Yield (i, j) index pairs of distinct uint64 hashes within radius bits."""
+    for shift, mask in band_masks(radius):
+        keys = (hashes >> np.uint64(shift)) & np.uint64(mask)
+        order = np.argsort(keys, kind='stable')
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+        for bucket in np.split(order, boundaries):
+            if len(bucket) < 2:
+                continue
+            values = hashes[bucket]
+            # Upper triangle of the bucket's distance matrix, a block of rows at a time
+            for start in range(0, len(bucket) - 1, block):
+                rows = slice(start, start + block)
+                distances = popcount(values[rows, None] ^ values[None, :])
+                distances[np.tril_indices(distances.shape[0], start, distances.shape[1])] = HASH_BITS + 1
+                for i, j in zip(*np.nonzero(distances <= radius)):
+                    yield bucket[start + i], bucket[j]
+
+
+def group_near_duplicates(hashes, radius=4):
+    """Connected groups (lists of positions into hashes) of hashes within radius bits.
+
+    Singletons are included, so every position appears in exactly one group.
+    Identical hashes are merged up front and only checked once.
+    """
+    unique, inverse = np.unique(np.asarray(hashes, dtype=np.uint64), return_inverse=True)
+    parent = list(range(len(unique)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in near_pairs(unique, radius):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    groups = {}
+    for position, u in enumerate(inverse.ravel()):
+        groups.setdefault(find(u), []).append(position)
+    return list(groups.values())
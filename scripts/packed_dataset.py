@@ -0,0 +1,295 @@
+"""
+Packed training data: each split of data/processed as memory-mapped uint8
+.npy shards instead of thousands of small JPEGs.
+
+    data/processed/packed/train/index.json
+    data/processed/packed/train/images-00000.npy   (N, 224, 224, 3) uint8
+    data/processed/packed/train/labels-00000.npy   (N,) int32
+
+data_prep.py writes it after syncing the JPEGs; train_my_model.py reads it
+with packed_dataset(). Images are decoded once at pack time, rows are
+stored in a seeded shuffled order, and batches are read from contiguous
+windows of the memory map (reshuffled within the window every epoch), so
+nothing is re-decoded per epoch and the dataset never has to fit in RAM.
+Labels follow image_dataset_from_directory's sorted class-folder order.
+
+When a split changes, rows whose (source, sha256) were already packed are
+copied out of the previous shards instead of being decoded again, so a
+repack only decodes the images that are new.
+
+Sources that are already arrays (e.g. CIFAR-10 via convert-to-ima.py) skip
+the JPEG round trip entirely: they are written once as an "array source"
+(data/raw/arrays/<name>.npy of 224×224 uint8 + <name>.json with label,
+keys and per-row hashes) and copied straight into the shards.
+"""
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from near_duplicates import dhash
+
+IMAGE_SHAPE = (224, 224, 3)
+
+
+def load_pixels(path):
+    """Processed JPEG → uint8 (224, 224, 3) (runs in a worker process)."""
+    with Image.open(path) as img:
+        return np.asarray(img.convert('RGB'), dtype=np.uint8)
+
+
+def split_rows(manifest, split):
+    """Sorted, de-duplicated (output, label, sha256) rows of one split from the data prep manifest."""
+    return sorted({(e['output'], e['label'], e['sha256']) for e in manifest['files'].values()
+                   if e['output'] and e['split'] == split})
+
+
+def write_array_source(folder, name, label, keys, sha256s, batches):
+    """Write an array source from an iterable of uint8 (n, 224, 224, 3) batches.
+
+    keys/sha256s are per row (provenance and content hash of the original
+    image, used for the split assignment); a perceptual hash of every row is
+    stored too, for near-duplicate detection. Written aside, then renamed.
+    """
+    os.makedirs(folder, exist_ok=True)
+    images_path = os.path.join(folder, f"{name}.npy")
+    images = np.lib.format.open_memmap(images_path + '.tmp', mode='w+', dtype=np.uint8,
+                                       shape=(len(keys), *IMAGE_SHAPE))
+    start = 0
+    phashes = []
+    for batch in batches:
+        images[start:start + len(batch)] = batch
+        phashes.extend(f"{dhash(Image.fromarray(img)):016x}" for img in batch)
+        start += len(batch)
+    images.flush()
+    del images
+    with open(os.path.join(folder, f"{name}.json.tmp"), 'w') as f:
+        json.dump({'label': label, 'keys': list(keys), 'sha256': list(sha256s), 'phash': phashes}, f)
+    os.replace(images_path + '.tmp', images_path)
+    os.replace(os.path.join(folder, f"{name}.json.tmp"), os.path.join(folder, f"{name}.json"))
+    return images_path
+
+
+def array_source_rows(folder):
+    """('array:<name>:<row>', label, sha256, phash) for every row of every array source in folder."""
+    rows = []
+    if not os.path.isdir(folder):
+        return rows
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith('.json') and os.path.exists(os.path.join(folder, filename[:-5] + '.npy')):
+            with open(os.path.join(folder, filename)) as f:
+                source = json.load(f)
+            if 'phash' not in source:
+                images = np.load(os.path.join(folder, filename[:-5] + '.npy'), mmap_mode='r')
+                source['phash'] = [f"{dhash(Image.fromarray(img)):016x}" for img in images]
+            rows.extend((f"array:{filename[:-5]}:{i}", source['label'], sha256, phash)
+                        for i, (sha256, phash) in enumerate(zip(source['sha256'], source['phash'])))
+    return rows
+
+
+def read_index(split_dir):
+    with open(os.path.join(split_dir, 'index.json')) as f:
+        return json.load(f)
+
+
+def write_split(processed_root, rows, split_dir, class_names, shard_size=4096, workers=None, seed=0,
+                array_root=None):
+    """Decode rows into shards under split_dir (built aside, then swapped in).
+
+    A row's source is either a JPEG path relative to processed_root or
+    'array:<name>:<row>' in array_root, which is copied without decoding.
+    Rows already in the previous pack are copied from its shards. Returns
+    how many rows were decoded or copied from array sources, or None when
+    the split was already up to date.
+    """
+    fingerprint = hashlib.sha256(json.dumps([rows, class_names, seed]).encode()).hexdigest()
+    previous, old_images = {}, []
+    if os.path.exists(os.path.join(split_dir, 'index.json')):
+        old_index = read_index(split_dir)
+        if old_index.get('fingerprint') == fingerprint:
+            return None
+        # Packs written before sha256 was recorded can't be matched safely and are rebuilt in full
+        if 'sha256' in old_index and old_index['image_shape'] == list(IMAGE_SHAPE):
+            old_images = [np.load(os.path.join(split_dir, s['images']), mmap_mode='r') for s in old_index['shards']]
+            locations = [(shard, row) for shard, s in enumerate(old_index['shards']) for row in range(s['count'])]
+            previous = {(source, sha256): location for source, sha256, location
+                        in zip(old_index['sources'], old_index['sha256'], locations)}
+
+    order = np.random.default_rng(seed).permutation(len(rows))
+    rows = [rows[i] for i in order]
+    tmp_dir = split_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    arrays = {}
+    shards = []
+    loaded = 0
+    with ProcessPoolExecutor(workers) as pool:
+        for shard, start in enumerate(range(0, len(rows), shard_size)):
+            chunk = rows[start:start + shard_size]
+            names = {'images': f"images-{shard:05d}.npy", 'labels': f"labels-{shard:05d}.npy", 'count': len(chunk)}
+            images = np.lib.format.open_memmap(os.path.join(tmp_dir, names['images']), mode='w+',
+                                               dtype=np.uint8, shape=(len(chunk), *IMAGE_SHAPE))
+            to_load = []
+            for i, (source, _, sha256) in enumerate(chunk):
+                if (source, sha256) in previous:
+                    shard_index, row = previous[source, sha256]
+                    images[i] = old_images[shard_index][row]
+                else:
+                    to_load.append(i)
+            loaded += len(to_load)
+            from_files = [i for i in to_load if not chunk[i][0].startswith('array:')]
+            paths = [os.path.join(processed_root, chunk[i][0]) for i in from_files]
+            for i, pixels in zip(from_files, pool.map(load_pixels, paths, chunksize=32)):
+                images[i] = pixels
+            for i in to_load:
+                source = chunk[i][0]
+                if source.startswith('array:'):
+                    _, name, row = source.split(':')
+                    if name not in arrays:
+                        arrays[name] = np.load(os.path.join(array_root, f"{name}.npy"), mmap_mode='r')
+                    images[i] = arrays[name][int(row)]
+            images.flush()
+            del images
+            labels = np.array([class_names.index(label) for _, label, _ in chunk], dtype=np.int32)
+            np.save(os.path.join(tmp_dir, names['labels']), labels)
+            shards.append(names)
+
+    index = {
+        'fingerprint': fingerprint,
+        'class_names': class_names,
+        'image_shape': list(IMAGE_SHAPE),
+        'count': len(rows),
+        'shards': shards,
+        'sources': [source for source, _, _ in rows],
+        'sha256': [sha256 for _, _, sha256 in rows],
+    }
+    with open(os.path.join(tmp_dir, 'index.json'), 'w') as f:
+        json.dump(index, f)
+    del previous, old_images  # release the old memory maps before their files go
+    shutil.rmtree(split_dir, ignore_errors=True)
+    os.replace(tmp_dir, split_dir)
+    return loaded
+
+
+def write_packed(processed_root, manifest, class_names, out_root=None, shard_size=4096, workers=None, seed=0,
+                 array_root=None, array_rows=None):
+    """Pack every split of the manifest; splits whose contents didn't change are left alone.
+
+    array_rows: {split: [rows from array_source_rows()]} to pack alongside.
+    """
+    out_root = out_root or os.path.join(processed_root, 'packed')
+    class_names = sorted(class_names)
+    for split in ('train', 'test'):
+        rows = split_rows(manifest, split) + sorted((array_rows or {}).get(split, []))
+        split_dir = os.path.join(out_root, split)
+        loaded = write_split(processed_root, rows, split_dir, class_names, shard_size, workers, seed, array_root)
+        if loaded is None:
+            print(f"📦 Packed {split} set is up to date")
+        else:
+            size_mb = len(rows) * int(np.prod(IMAGE_SHAPE)) / 1e6
+            print(f"📦 Packed {len(rows)} {split} images ({size_mb:.0f} MB, {loaded} new, "
+                  f"{len(rows) - loaded} reused) → {split_dir}")
+
+
+def load_packed(split_dir):
+    """(index, [image memmaps], [label arrays]) for one packed split. Nothing is read yet."""
+    index = read_index(split_dir)
+    images = [np.load(os.path.join(split_dir, s['images']), mmap_mode='r') for s in index['shards']]
+    labels = [np.load(os.path.join(split_dir, s['labels'])) for s in index['shards']]
+    return index, images, labels
+
+
+def packed_dataset(split_dir, batch_size=32, shuffle=False, seed=None, soft_labels=None, shuffle_window=1024):
+    """tf.data pipeline of (float32 images, int32 labels) batches, like image_dataset_from_directory.
+
+    Without shuffle each batch is a contiguous slice of one shard's memory
+    map (a view, no gather copy). With shuffle=True, every epoch each shard
+    is cut into windows of shuffle_window rows, the windows are visited in
+    random order and the rows inside a window are permuted before being cut
+    into batches, so batch contents change from epoch to epoch while reads
+    stay within one window of the memory map. Rows were already shuffled
+    once at pack time, so a bounded window mixes like a shuffle buffer.
+
+    soft_labels: optional per-row float array in index['sources'] order
+    (e.g. teacher predictions); the labels then become float32 (batch, 2)
+    [hard label, soft label] pairs.
+    """
+    import tensorflow as tf
+
+    index, images, labels = load_packed(split_dir)
+    if soft_labels is not None:
+        starts = np.cumsum([0] + [s['count'] for s in index['shards']])
+        labels = [np.stack([hard.astype(np.float32), soft_labels[start:start + len(hard)]], axis=1)
+                  for hard, start in zip(labels, starts)]
+    blocks = [(shard, start) for shard, s in enumerate(index['shards'])
+              for start in range(0, s['count'], batch_size)]
+    # A whole number of batches per window keeps the batch count (and the cardinality) fixed
+    window = max(1, shuffle_window // batch_size) * batch_size
+    windows = [(shard, start, min(window, s['count'] - start)) for shard, s in enumerate(index['shards'])
+               for start in range(0, s['count'], window)]
+    rng = np.random.default_rng(seed)
+
+    def generator():
+        if not shuffle:
+            for shard, start in blocks:
+                yield images[shard][start:start + batch_size], labels[shard][start:start + batch_size]
+            return
+        for i in rng.permutation(len(windows)):
+            shard, start, count = windows[i]
+            rows = start + rng.permutation(count)
+            for batch_start in range(0, count, batch_size):
+                # Sorted so the gather walks the memory map forwards
+                batch = np.sort(rows[batch_start:batch_start + batch_size])
+                yield images[shard][batch], labels[shard][batch]
+
+    dataset = tf.data.Dataset.from_generator(generator, output_signature=(
+        tf.TensorSpec((None, *index['image_shape']), tf.uint8),
+        tf.TensorSpec((None,), tf.int32) if soft_labels is None else tf.TensorSpec((None, 2), tf.float32),
+    )).apply(tf.data.experimental.assert_cardinality(len(blocks)))
+    # uint8 on the way in (4× less to move), float32 like image_dataset_from_directory
+    dataset = dataset.map(lambda x, y: (tf.cast(x, tf.float32), y), num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def folder_dataset(folder, batch_size=32, image_size=(224, 224), skip=(), shuffle=True, seed=None):
+    """image_dataset_from_directory without the files in skip (e.g. the quarantine list).
+
+    Fallback for when there is no packed dataset: same sorted class-folder
+    labels, bilinear resize and float32 output, but built from an explicit
+    file list so a known-bad file can't crash an epoch half-way through.
+    Returns (dataset, class_names).
+    """
+    import tensorflow as tf
+
+    skip = {os.path.abspath(path) for path in skip}
+    class_names = sorted(d for d in os.listdir(folder) if os.path.isdir(os.path.join(folder, d)))
+    paths, labels = [], []
+    skipped = 0
+    for label, class_name in enumerate(class_names):
+        for name in sorted(os.listdir(os.path.join(folder, class_name))):
+            path = os.path.join(folder, class_name, name)
+            if not name.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+                continue
+            if os.path.abspath(path) in skip:
+                skipped += 1
+                continue
+            paths.append(path)
+            labels.append(label)
+    if not paths:
+        raise ValueError(f"No usable images in {folder} ({skipped} quarantined files skipped); "
+                         "run data_prep.py or check data/quarantine.json")
+
+    def load(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        return tf.image.resize(image, image_size), label
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, tf.constant(labels, tf.int32)))
+    if shuffle:
+        dataset = dataset.shuffle(len(paths), seed=seed)
+    dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE).batch(batch_size)
+    return dataset, class_names
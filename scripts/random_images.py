@@ -1,103 +1,43 @@
 import os
-import shutil
-import random
-from pathlib import Path
 
-def select_random_images(source_path, dest_path, images_per_species=50):
+from sampling import print_summary, sample_to
+
+# List of all species folders
+SPECIES_FOLDERS = [
+    "Ankylosaurus",
+    "Brachiosaurus", 
+    "Compsognathus",
+    "Corythosaurus",
+    "Dilophosaurus",
+    "Dimorphodon",
+    "Gallimimus",
+    "Microceratus",
+    "Pachycephalosaurus",
+    "Parasaurolophus",
+    "Spinosaurus",
+    "Stegosaurus",
+    "Triceratops",
+    "Tyrannosaurus_Rex",
+    "Velociraptor"
+]
+
+def select_random_images(source_path, dest_path, images_per_species=50, seed=42):
     """
-    Select random images from each species folder and copy them to a destination folder.
+    Select random images from each species folder and list them in a manifest
+    (or copy them to a destination folder).
     
     Args:
         source_path: Path to the dinosaur_dataset folder with species subfolders
-        dest_path: Path where selected images will be copied
+        dest_path: Manifest (.jsonl) to write, or folder where selected images will be copied
         images_per_species: Number of random images to select per species (default: 50)
+        seed: Sampling seed (same seed → same images)
     """
-    
-    # Create destination folder if it doesn't exist
-    os.makedirs(dest_path, exist_ok=True)
-    
-    # List of all species folders
-    species_folders = [
-        "Ankylosaurus",
-        "Brachiosaurus", 
-        "Compsognathus",
-        "Corythosaurus",
-        "Dilophosaurus",
-        "Dimorphodon",
-        "Gallimimus",
-        "Microceratus",
-        "Pachycephalosaurus",
-        "Parasaurolophus",
-        "Spinosaurus",
-        "Stegosaurus",
-        "Triceratops",
-        "Tyrannosaurus_Rex",
-        "Velociraptor"
-    ]
-    
-    total_copied = 0
-    stats = {}
-    
     print("🦖 Starting random image selection...\n")
     
-    for species in species_folders:
-        species_path = Path(source_path) / species
-        
-        # Check if folder exists
-        if not species_path.exists():
-            print(f"⚠️  Warning: Folder '{species}' not found, skipping...")
-            continue
-        
-        # Get all image files (jpg, jpeg, png)
-        image_files = []
-        for ext in ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.JPEG', '*.PNG']:
-            image_files.extend(list(species_path.glob(ext)))
-        
-        total_images = len(image_files)
-        
-        if total_images == 0:
-            print(f"⚠️  Warning: No images found in '{species}', skipping...")
-            continue
-        
-        # Select random images
-        num_to_select = min(images_per_species, total_images)
-        selected_images = random.sample(image_files, num_to_select)
-        
-        # Copy selected images to destination
-        copied_count = 0
-        for i, img_path in enumerate(selected_images):
-            try:
-                # Create a new filename: species_number.extension
-                new_filename = f"{species}_{i+1:03d}{img_path.suffix}"
-                dest_file = Path(dest_path) / new_filename
-                
-                shutil.copy2(img_path, dest_file)
-                copied_count += 1
-                
-            except Exception as e:
-                print(f"❌ Error copying {img_path.name}: {e}")
-        
-        stats[species] = {
-            'total': total_images,
-            'selected': num_to_select,
-            'copied': copied_count
-        }
-        
-        total_copied += copied_count
-        print(f"✅ {species}: Selected {copied_count}/{total_images} images")
-    
-    # Print summary
-    print("\n" + "="*60)
-    print("📊 SELECTION SUMMARY")
-    print("="*60)
-    
-    for species, info in stats.items():
-        print(f"{species:25s} | Available: {info['total']:3d} | Selected: {info['copied']:2d}")
-    
-    print("="*60)
-    print(f"🎉 Total images copied: {total_copied}")
-    print(f"📁 Destination: {dest_path}")
-    print("="*60)
+    quotas = {species: images_per_species for species in SPECIES_FOLDERS}
+    stats = sample_to(source_path, dest_path, quotas, 'dinosaur', seed=seed)
+    print_summary(stats, dest_path)
+    return stats
 
 def main():
     """Main function to run the script"""
@@ -110,7 +50,9 @@ def main():
     # Option 2: If you're using the folders from your screenshot
     # SOURCE_PATH = "/path/to/folder/containing/species/folders"
     
-    DESTINATION_PATH = "/Users/aryahb/IsItADino/is-it-a-dino/data/raw/dinosaur"
+    # A manifest is read in place by data_prep.py (nothing is copied).
+    # Point this at data/raw/dinosaur instead to copy the files over.
+    DESTINATION_PATH = "/Users/aryahb/IsItADino/is-it-a-dino/data/raw/manifests/kaggle_dinosaurs.jsonl"
     IMAGES_PER_SPECIES = 50
     
     # Check if source path exists
@@ -125,6 +67,4 @@ def main():
     print("   Next step: Run 'python scripts/data_prep.py'")
 
 if __name__ == "__main__":
-    # Set random seed for reproducibility
-    random.seed(42)
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,176 @@
+"""
+Shared random-image sampling for the dataset-building scripts
+(random_images.py, random_anim.py, random_faces.py).
+
+Each folder is scanned exactly once with os.scandir and sampled in a single
+streaming pass that keeps at most k candidates in memory, however big the
+folder is. Selection is a seeded bottom-k sample: every file gets a
+pseudo-random key derived from (seed, class, file name), and the k smallest
+keys win. That is a uniform random sample like random.sample, but it does
+not depend on the order the filesystem lists files in, so the same seed
+picks the same files on every machine.
+
+The selection is written as a manifest (a .jsonl of source paths, labels
+and provenance) that data_prep.py reads in place, so a dataset variant
+costs a few KB instead of a copy of every image. Copying into a folder is
+still supported; those copies run on a thread pool, since they are I/O
+bound (and often on network mounts).
+"""
+import hashlib
+import heapq
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def sample_key(seed, group, name):
+    """Deterministic 64-bit pseudo-random key for one file."""
+    digest = hashlib.blake2b(f"{seed}/{group}/{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def iter_images(folder):
+    """DirEntry for every image file directly inside folder (one scandir pass)."""
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                yield entry
+
+
+def reservoir_sample(folder, k, seed=42, group=''):
+    """(selected paths, number of images seen) for a uniform sample of k images in folder.
+
+    Streams the directory once, holding a max-heap of the k smallest keys.
+    Selected paths come back ordered by key, so output naming is stable too.
+    """
+    heap = []  # (-key, name, path)
+    seen = 0
+    for entry in iter_images(folder):
+        seen += 1
+        key = sample_key(seed, group, entry.name)
+        if len(heap) < k:
+            heapq.heappush(heap, (-key, entry.name, entry.path))
+        elif -heap[0][0] > key:
+            heapq.heapreplace(heap, (-key, entry.name, entry.path))
+    return [path for _, _, path in sorted(heap, reverse=True)], seen
+
+
+def list_class_folders(source):
+    """Sorted names of the sub-folders of source (one per class)."""
+    with os.scandir(source) as entries:
+        return sorted(entry.name for entry in entries if entry.is_dir())
+
+
+def sample_classes(source, quotas, seed=42):
+    """Stratified sampling: {class: (selected paths, available)} for quotas {class: k}."""
+    results = {}
+    for class_name, k in quotas.items():
+        class_path = os.path.join(source, class_name)
+        if not os.path.isdir(class_path):
+            print(f"⚠️  Warning: Folder '{class_name}' not found, skipping...")
+            continue
+        selected, available = reservoir_sample(class_path, k, seed, class_name)
+        if available == 0:
+            print(f"⚠️  Warning: No images found in '{class_name}', skipping...")
+            continue
+        results[class_name] = (selected, available)
+    return results
+
+
+def copy_files(pairs, workers=16):
+    """Copy (src, dest) pairs on a thread pool; returns {src: error or None}."""
+    def copy_one(pair):
+        src, dest = pair
+        try:
+            shutil.copy2(src, dest)
+            return src, None
+        except Exception as e:
+            return src, str(e)
+
+    with ThreadPoolExecutor(workers) as pool:
+        return dict(pool.map(copy_one, pairs))
+
+
+def write_manifest(path, rows):
+    """Write manifest rows as JSON lines (atomically)."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+    os.replace(tmp, path)
+
+
+def read_manifest(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def sample_to_manifest(source, manifest_path, quotas, label, seed=42, provenance=None):
+    """Sample every class in quotas and record the picks in a manifest instead of copying.
+
+    Each row: {"path", "label", "class", "source", "seed"}; paths are absolute
+    and are read in place by data_prep.py. Returns {class: stats}.
+    """
+    selection = sample_classes(source, quotas, seed)
+    provenance = provenance or os.path.basename(os.path.normpath(source))
+    rows = []
+    stats = {}
+    for class_name, (selected, available) in selection.items():
+        rows.extend({'path': os.path.abspath(path), 'label': label, 'class': class_name or None,
+                     'source': provenance, 'seed': seed} for path in selected)
+        stats[class_name] = {'total': available, 'selected': len(selected), 'copied': len(selected)}
+        print(f"✅ {class_name or os.path.basename(source)}: Selected {len(selected)}/{available} images")
+    write_manifest(manifest_path, rows)
+    return stats
+
+
+def sample_to(source, dest, quotas, label, seed=42, rename=True, workers=16):
+    """A dest ending in .jsonl gets a manifest, anything else is a folder to copy into."""
+    if dest.endswith('.jsonl'):
+        return sample_to_manifest(source, dest, quotas, label, seed)
+    return sample_and_copy(source, dest, quotas, seed, rename, workers)
+
+
+def sample_and_copy(source, dest, quotas, seed=42, rename=True, workers=16):
+    """Sample every class in quotas and copy the picks into dest.
+
+    rename=True names copies <class>_<NNN><ext> (as the old scripts did);
+    otherwise the original file name is kept. Returns {class: stats}.
+    """
+    os.makedirs(dest, exist_ok=True)
+    selection = sample_classes(source, quotas, seed)
+
+    pairs = []
+    for class_name, (selected, _) in selection.items():
+        for i, path in enumerate(selected):
+            suffix = os.path.splitext(path)[1]
+            name = f"{class_name}_{i+1:03d}{suffix}" if rename else os.path.basename(path)
+            pairs.append((path, os.path.join(dest, name)))
+    errors = copy_files(pairs, workers)
+
+    stats = {}
+    for class_name, (selected, available) in selection.items():
+        failed = [path for path in selected if errors.get(path)]
+        for path in failed:
+            print(f"❌ Error copying {os.path.basename(path)}: {errors[path]}")
+        stats[class_name] = {'total': available, 'selected': len(selected), 'copied': len(selected) - len(failed)}
+        print(f"✅ {class_name or os.path.basename(source)}: Selected {stats[class_name]['copied']}/{available} images")
+    return stats
+
+
+def print_summary(stats, dest):
+    print("\n" + "="*60)
+    print("📊 SELECTION SUMMARY")
+    print("="*60)
+    for class_name, info in stats.items():
+        print(f"{class_name:25s} | Available: {info['total']:4d} | Selected: {info['copied']:3d}")
+    print("="*60)
+    verb = "listed in manifest" if dest.endswith('.jsonl') else "copied"
+    print(f"🎉 Total images {verb}: {sum(info['copied'] for info in stats.values())}")
+    print(f"📁 Destination: {dest}")
+    print("="*60)
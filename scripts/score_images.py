@@ -0,0 +1,303 @@
+"""
+Score a whole directory tree of images offline with the same model and
+preprocessing as app.py.
+
+    python scripts/score_images.py /data/uploads scores.jsonl --workers 8 --batch-size 64
+
+The tree is streamed (one directory listing in memory at a time), images are
+decoded on a process pool with a bounded number in flight, and scored in
+batched forward passes. Results go to CSV, JSONL or Parquet (by extension;
+Parquet needs pyarrow and is written as part files inside a directory).
+
+Output is checkpointed every --checkpoint-every images. Re-running the same
+command after an interruption skips everything already written and carries on.
+An existing CSV/JSONL file without a checkpoint is never replaced unless
+--overwrite is given.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from inference import BACKEND, DEFAULT_MODEL_PATHS, MODEL_PATH, load_engine, power_of_two_buckets
+from preprocessing import IMG_SIZE, decode_image, fit_to_model
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+FIELDS = ['path', 'score', 'label', 'error']
+
+
+def iter_images(root):
+    """Yield image paths under root in a stable (sorted, depth-first) order."""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                entries = sorted(entries, key=lambda e: e.name)
+        except OSError as e:
+            print(f"⚠️  Skipping {folder}: {e}")
+            continue
+        subfolders = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry.path)
+            elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                yield entry.path
+        stack.extend(reversed(subfolders))
+
+
+def decode_worker(path):
+    """Runs in a worker process: (uint8 224×224×3 pixels or None, error or None, seconds)."""
+    start = time.perf_counter()
+    try:
+        pixels = np.asarray(fit_to_model(decode_image(path)), dtype=np.uint8)
+        return pixels, None, time.perf_counter() - start
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start
+
+
+# -------------------------------------------------------------
+# Result writers (all resumable)
+# -------------------------------------------------------------
+class LineWriter:
+    """CSV / JSONL writer. Checkpoints record the byte offset of the last
+    fully flushed row, so a resumed run truncates any partial tail first."""
+
+    def __init__(self, path, fmt, overwrite=False):
+        self.path = path
+        self.fmt = fmt
+        self.checkpoint_path = path + '.checkpoint'
+        offset = 0
+        if os.path.exists(self.checkpoint_path) and os.path.exists(path):
+            with open(self.checkpoint_path) as f:
+                offset = json.load(f)['offset']
+        elif os.path.exists(path):
+            # No checkpoint: not a run we can resume, and maybe someone else's results
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists and has no {self.checkpoint_path} to resume from; "
+                                      "pass --overwrite to replace it")
+            os.remove(path)
+        self.file = open(path, 'a+', newline='')
+        self.file.truncate(offset)
+        self.file.seek(offset)
+        self.done = self._read_done()
+        self.file.seek(0, os.SEEK_END)
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if offset == 0:
+                self.csv.writeheader()
+
+    def _read_done(self):
+        self.file.seek(0)
+        if self.fmt == 'csv':
+            return {row['path'] for row in csv.DictReader(self.file)}
+        return {json.loads(line)['path'] for line in self.file if line.strip()}
+
+    def write(self, rows):
+        for row in rows:
+            if self.fmt == 'csv':
+                self.csv.writerow(row)
+            else:
+                self.file.write(json.dumps(row) + '\n')
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'offset': self.file.tell()}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def close(self):
+        self.checkpoint()
+        self.file.close()
+
+
+class ParquetWriter:
+    """Parquet output as a directory of part files, one per checkpoint.
+
+    Each part is written to a temp name and renamed, so only complete parts exist.
+    """
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.parts = sorted(p for p in os.listdir(path) if p.endswith('.parquet'))
+        self.done = set()
+        for part in self.parts:
+            self.done.update(pq.read_table(os.path.join(path, part), columns=['path']).column('path').to_pylist())
+        self.pending = []
+
+    def write(self, rows):
+        self.pending.extend(rows)
+
+    def checkpoint(self):
+        if not self.pending:
+            return
+        table = self.pa.Table.from_pylist(self.pending, schema=self.pa.schema([
+            ('path', self.pa.string()), ('score', self.pa.float32()),
+            ('label', self.pa.string()), ('error', self.pa.string()),
+        ]))
+        name = f"part-{len(self.parts):05d}.parquet"
+        tmp = os.path.join(self.path, name + '.tmp')
+        self.pq.write_table(table, tmp)
+        os.replace(tmp, os.path.join(self.path, name))
+        self.parts.append(name)
+        self.pending = []
+
+    def close(self):
+        self.checkpoint()
+
+
+def open_writer(output, overwrite=False):
+    suffix = Path(output).suffix.lower()
+    if suffix == '.csv':
+        return LineWriter(output, 'csv', overwrite)
+    if suffix in ('.jsonl', '.ndjson'):
+        return LineWriter(output, 'jsonl', overwrite)
+    if suffix == '.parquet':
+        return ParquetWriter(output)
+    raise ValueError(f"Unsupported output format {suffix!r} (use .csv, .jsonl or .parquet)")
+
+
+# -------------------------------------------------------------
+# Pipeline
+# -------------------------------------------------------------
+def score_tree(root, writer, engine, workers=None, batch_size=64, checkpoint_every=5000, max_in_flight=None):
+    """Score every image under root into an open_writer() writer; returns per-stage timings."""
+    if writer.done:
+        print(f"↩️  Resuming: {len(writer.done)} images already scored")
+
+    max_in_flight = max_in_flight or batch_size * 4
+    timings = {'scan': 0.0, 'decode (workers)': 0.0, 'decode wait': 0.0, 'inference': 0.0, 'write': 0.0}
+    scored = 0
+    since_checkpoint = 0
+    started = time.perf_counter()
+    batch = np.empty((batch_size, *IMG_SIZE, 3), dtype=np.float32)
+
+    def flush(items):
+        """Classify one batch of decoded items and write their rows."""
+        nonlocal scored, since_checkpoint
+        rows = []
+        ok = [i for i, (_, pixels, _) in enumerate(items) if pixels is not None]
+        for slot, i in enumerate(ok):
+            np.copyto(batch[slot], items[i][1], casting='unsafe')
+        scores = {}
+        if ok:
+            start = time.perf_counter()
+            for i, score in zip(ok, engine.classify(batch[:len(ok)])):
+                scores[i] = float(score)
+            timings['inference'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, (path, _, error) in enumerate(items):
+            score = scores.get(i)
+            rows.append({
+                'path': path,
+                'score': score,
+                'label': None if score is None else ('dinosaur' if score > 0.5 else 'not_dinosaur'),
+                'error': error,
+            })
+        writer.write(rows)
+        scored += len(items)
+        since_checkpoint += len(items)
+        if since_checkpoint >= checkpoint_every:
+            writer.checkpoint()
+            since_checkpoint = 0
+            elapsed = time.perf_counter() - started
+            print(f"💾 Checkpoint: {scored} images ({scored / elapsed:.1f} img/s)")
+        timings['write'] += time.perf_counter() - start
+
+    with ProcessPoolExecutor(workers) as pool:
+        in_flight = deque()
+        ready = []
+        paths = iter_images(root)
+        exhausted = False
+        while not exhausted or in_flight:
+            # Keep the pool fed, but never hold more than max_in_flight decoded images
+            start = time.perf_counter()
+            while not exhausted and len(in_flight) < max_in_flight:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                elif path not in writer.done:
+                    in_flight.append((path, pool.submit(decode_worker, path)))
+            timings['scan'] += time.perf_counter() - start
+            if not in_flight:
+                break
+
+            path, future = in_flight.popleft()
+            start = time.perf_counter()
+            pixels, error, seconds = future.result()
+            timings['decode wait'] += time.perf_counter() - start
+            timings['decode (workers)'] += seconds
+            ready.append((path, pixels, error))
+            if len(ready) == batch_size:
+                flush(ready)
+                ready = []
+        if ready:
+            flush(ready)
+
+    writer.close()
+    timings['total'] = time.perf_counter() - started
+    timings['images'] = scored
+    return timings
+
+
+def print_summary(timings):
+    total = timings['total']
+    print("\n" + "=" * 60)
+    print("📊 SCORING SUMMARY")
+    print("=" * 60)
+    print(f"Images scored : {timings['images']}")
+    print(f"Wall time     : {total:.1f}s  ({timings['images'] / total if total else 0:.1f} img/s)")
+    for stage in ('scan', 'decode (workers)', 'decode wait', 'inference', 'write'):
+        print(f"  {stage:18s}: {timings[stage]:8.2f}s")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input_dir")
+    parser.add_argument("output", help="results file: .csv, .jsonl or .parquet")
+    parser.add_argument("--backend", default=BACKEND, choices=sorted(DEFAULT_MODEL_PATHS))
+    parser.add_argument("--model", default=None, help="defaults to DINO_MODEL_PATH or the backend's model file")
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint-every", type=int, default=5000)
+    parser.add_argument("--overwrite", action="store_true",
+                        help="replace an existing output file that has no checkpoint to resume from")
+    args = parser.parse_args()
+    if args.model is None:
+        args.model = MODEL_PATH if args.backend == BACKEND else DEFAULT_MODEL_PATHS[args.backend]
+
+    # Opened before the model loads so a refused output fails fast
+    try:
+        writer = open_writer(args.output, args.overwrite)
+    except FileExistsError as e:
+        sys.exit(f"❌ {e}")
+
+    print(f"🦖 Scoring {args.input_dir} → {args.output}")
+    print(f"🔄 Loading {args.backend} model from {args.model}...")
+    engine = load_engine(args.model, args.backend, power_of_two_buckets(args.batch_size))
+
+    timings = score_tree(args.input_dir, writer, engine, args.workers, args.batch_size,
+                         args.checkpoint_every)
+    print_summary(timings)
+
+
+if __name__ == "__main__":
+    main()
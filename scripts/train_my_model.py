@@ -10,6 +10,12 @@ from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 import pathlib
 import os
 
+from architectures import (DEFAULT_ARCHITECTURE, DEFAULT_WIDTH, augment_dataset, build_augmentation,
+                           build_model, count_flops)
+from export_tflite import build_report, export_tflite, print_report
+from packed_dataset import folder_dataset, packed_dataset, read_index
+from validate_images import iter_image_files, validate_paths
+
 
 #Questions to learn from
 #"What does 'epochs' mean?"
@@ -21,21 +27,53 @@ import os
 batch_size = 32
 img_height = 224
 img_width = 224
+train_dir = "/Users/aryahb/IsItADino/is-it-a-dino/data/processed/train"
+test_dir = "/Users/aryahb/IsItADino/is-it-a-dino/data/processed/test"
+packed_dir = "/Users/aryahb/IsItADino/is-it-a-dino/data/processed/packed"
 
-#I want to load data from processed into datasets
-train_ds = tf.keras.utils.image_dataset_from_directory(
-  "/Users/aryahb/IsItADino/is-it-a-dino/data/processed/train",
-  labels='inferred',
-  image_size=(img_height, img_width),  
-  batch_size=batch_size)
-
-test_ds = tf.keras.utils.image_dataset_from_directory(
-  "/Users/aryahb/IsItADino/is-it-a-dino/data/processed/test",
-  labels='inferred',
-  image_size=(img_height, img_width),  
-  batch_size=batch_size)
+AUTOTUNE = tf.data.AUTOTUNE
 
-class_names = train_ds.class_names
+#Augmentation runs as a map in the input pipeline (see below). How many
+#batches get augmented at once, and whether they must come out in order
+#(False is faster; True makes runs with the same seed repeatable).
+augment_parallel_calls = AUTOTUNE
+augment_deterministic = False
+
+#data_prep.py also writes the images as memory-mapped uint8 shards.
+#Reading those skips decoding thousands of JPEGs and doesn't need the
+#whole dataset in RAM, so use them when they are there.
+if os.path.exists(os.path.join(packed_dir, 'train', 'index.json')):
+  train_ds = packed_dataset(os.path.join(packed_dir, 'train'), batch_size, shuffle=True, seed=123)
+  test_ds = packed_dataset(os.path.join(packed_dir, 'test'), batch_size)
+  class_names = read_index(os.path.join(packed_dir, 'train'))['class_names']
+else:
+  #A truncated or broken file would crash training mid-epoch, so check the
+  #folders first (cached, so only new files are actually opened) and leave
+  #out everything on the quarantine list.
+  quarantined = validate_paths(list(iter_image_files([train_dir, test_dir])))
+  if quarantined:
+    print(f"🚫 Skipping {len(quarantined)} quarantined images")
+
+  #I want to load data from processed into datasets
+  train_ds, class_names = folder_dataset(
+    train_dir,
+    batch_size=batch_size,
+    image_size=(img_height, img_width),
+    skip=quarantined)
+
+  test_ds, _ = folder_dataset(
+    test_dir,
+    batch_size=batch_size,
+    image_size=(img_height, img_width),
+    skip=quarantined,
+    shuffle=False)
+
+  #train_ds.cache keeps data in ram. So its easier to retrive for more epochs.
+  #prefetch makes it so it will overlap work. When GPU is training the 
+  #tensorflow can load and perpare batch N+1 in background.
+  #AUTOTUNE lets tensorflow pick the optimal number of batches.
+  train_ds = train_ds.cache().shuffle(1000)
+  test_ds = test_ds.cache().prefetch(buffer_size=AUTOTUNE)
 # plt.figure(figsize=(10, 10))
 # for images, labels in train_ds.take(1):
 #   for i in range(9):
@@ -45,15 +83,6 @@ class_names = train_ds.class_names
 #     plt.axis("off")
 # plt.show()
 
-#make sure data is split.
-AUTOTUNE = tf.data.AUTOTUNE
-#train_ds.cache keeps data in ram. So its easier to retrive for more epochs.
-#prefetch makes it so it will overlap work. When GPU is training the 
-#tensorflow can load and perpare batch N+1 in background.
-#AUTOTUNE lets tensorflow pick the optimal number of batches.
-train_ds = train_ds.cache().shuffle(1000).prefetch(buffer_size=AUTOTUNE)
-test_ds = test_ds.cache().prefetch(buffer_size=AUTOTUNE)
-
 #Standardize data so make range be [0,1].
 normalization_layer = layers.Rescaling(1./255)
 
@@ -65,39 +94,33 @@ num_classes = len(class_names)
 
 #data agumentation means 
 #random transformations that yield believable-looking images
-data_augmentation = keras.Sequential(
-  [
-    layers.RandomFlip("horizontal",
-                      input_shape=(img_height,
-                                  img_width,
-                                  3)),
-    layers.RandomRotation(0.1),
-    layers.RandomZoom(0.1),
-  ]
-)
+data_augmentation = build_augmentation(img_height, img_width)
+
+#It used to be the first layer of the model, which meant it ran
+#single-threaded inside every training step and got saved into the .keras
+#file the app loads (where it does nothing). Now it is a parallel map over
+#the training batches (after the cache, so every epoch gets new random
+#transformations) and the saved model only has what prediction needs.
+train_ds = augment_dataset(train_ds, data_augmentation,
+                           num_parallel_calls=augment_parallel_calls,
+                           deterministic=augment_deterministic).prefetch(buffer_size=AUTOTUNE)
 
 #Add droplets layers too.
 #When adding to a layer it randomly drops off a number of output units
 #from the layer during the trianing process.
 #  layers.Dropout(0.2),
 
-#builds model
-model = Sequential([
-  data_augmentation,
-  layers.Rescaling(1./255),  # Your images are 224×224
-  layers.Conv2D(16, 3, padding='same', activation='relu'),
-  layers.MaxPooling2D(),
-  layers.Dropout(0.2),
-  layers.Conv2D(32, 3, padding='same', activation='relu'),
-  layers.MaxPooling2D(),
-  layers.Dropout(0.3),
-  layers.Conv2D(64, 3, padding='same', activation='relu'),
-  layers.MaxPooling2D(),
-  layers.Dropout(0.4),
-  layers.Flatten(),
-  layers.Dense(128, activation='relu'),
-  layers.Dense(1, activation='sigmoid')  # Changed for binary classification!
-])
+#builds model. The old model flattened 28x28x64 into Dense(128): 6.4M
+#parameters in one layer, most of the model file and load time. The
+#default ('gap') averages each channel instead. It is set in
+#architectures.py so the benchmarks' stand-in model is always this same
+#one. scripts/compare_architectures.py trains every option and shows
+#size/latency/accuracy side by side ('baseline' is the old model).
+architecture = DEFAULT_ARCHITECTURE
+width_multiplier = DEFAULT_WIDTH
+model = build_model(architecture, img_height, img_width, width=width_multiplier)
+print(f"{architecture} (width {width_multiplier}): {model.count_params():,} params, "
+      f"{count_flops(model) / 1e6:.0f} MFLOPs per image")
 
 #We use binary because we are doing yes or no. 2 options
 model.compile(optimizer='adam',
@@ -159,6 +182,12 @@ plt.show()
 os.makedirs('models', exist_ok=True)
 model.save('models/dinosaur_classifier.keras')
 
+#Export smaller TFLite copies (float32 / float16 / int8) for CPU serving.
+#int8 is calibrated on a sample of the training images. The report compares
+#accuracy, latency and memory of every backend.
+tflite_paths = export_tflite('models/dinosaur_classifier.keras', 'models', train_dir=train_dir)
+print_report(build_report('models/dinosaur_classifier.keras', tflite_paths, test_dir))
+
 #Ran on colab so this might show an error in an IDE like vs code.
 !cp models/dinosaur_classifier.keras /content/drive/MyDrive/IsItADino/
 print("☁️ Copied model to Google Drive folder: MyDrive/IsItADino/")
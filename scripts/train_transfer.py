@@ -0,0 +1,184 @@
+"""
+Transfer learning on a frozen ImageNet backbone with cached embeddings.
+
+    python scripts/train_transfer.py --weights models/backbones/mobilenet_v2_no_top.h5
+    python scripts/train_transfer.py --weights ... --heads linear mlp --learning-rates 1e-3 3e-4 --dropouts 0.2 0.5
+
+The backbone (loaded from a local weights file, e.g. Keras's
+mobilenet_v2_weights_tf_dim_ordering_tf_kernels_1.0_224_no_top.h5) runs over
+every image in data prep's manifest once. Its pooled embeddings go into a
+memory-mapped store keyed by image sha256 (data/embeddings/), so later runs
+only embed images that are new. Every head × learning rate × dropout is then
+trained on the cached vectors, which takes seconds, and the best one by
+validation accuracy is stacked on the backbone and saved as a normal
+.keras model that app.py can load (DINO_MODEL_PATH=...).
+
+No augmentation here: each image has exactly one cached embedding.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embedding_store import EMBEDDING_ROOT, EmbeddingStore
+from packed_dataset import load_pixels, split_rows
+from prediction_cache import file_fingerprint
+from preprocessing import IMG_SIZE
+
+
+def manifest_rows(manifest):
+    """(source, label, sha256, split) for every image data prep kept, files and array sources alike."""
+    rows = [(output, label, sha256, split) for split in ('train', 'test')
+            for output, label, sha256 in split_rows(manifest, split)]
+    rows += [(source, row['label'], row['sha256'], row['split'])
+             for source, row in sorted(manifest.get('arrays', {}).items()) if not row['duplicate_of']]
+    return rows
+
+
+def load_batch(rows, processed_root, array_root, pool):
+    """uint8 (len(rows), 224, 224, 3) pixels for manifest rows (JPEGs decoded on the pool)."""
+    batch = np.empty((len(rows), *IMG_SIZE, 3), dtype=np.uint8)
+    from_files = [i for i, (source, *_) in enumerate(rows) if not source.startswith('array:')]
+    paths = [os.path.join(processed_root, rows[i][0]) for i in from_files]
+    for i, pixels in zip(from_files, pool.map(load_pixels, paths, chunksize=8)):
+        batch[i] = pixels
+    for i, (source, *_) in enumerate(rows):
+        if source.startswith('array:'):
+            _, name, row = source.split(':')
+            batch[i] = np.load(os.path.join(array_root, f"{name}.npy"), mmap_mode='r')[int(row)]
+    return batch
+
+
+def embed_missing(store, backbone, rows, processed_root, array_root, batch_size=64, chunk_size=2048, workers=None):
+    """Run the backbone over every row whose sha256 isn't in the store yet."""
+    import tensorflow as tf
+
+    by_sha = {row[2]: row for row in rows}
+    missing = store.missing(by_sha)
+    if not missing:
+        print(f"🧊 All {len(by_sha)} embeddings cached")
+        return 0
+
+    print(f"🧊 Embedding {len(missing)} new images ({len(by_sha) - len(missing)} cached)...")
+    forward = tf.function(lambda x: backbone(x, training=False), autograph=False)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk_start in range(0, len(missing), chunk_size):
+            keys = missing[chunk_start:chunk_start + chunk_size]
+            vectors = []
+            for start in range(0, len(keys), batch_size):
+                batch = load_batch([by_sha[key] for key in keys[start:start + batch_size]],
+                                   processed_root, array_root, pool)
+                vectors.append(forward(tf.constant(batch, tf.float32)).numpy())
+            store.add(keys, np.concatenate(vectors))
+            done = chunk_start + len(keys)
+            print(f"  {done}/{len(missing)} ({done / (time.perf_counter() - started):.1f} img/s)")
+    return len(missing)
+
+
+def train_heads(train, test, heads, learning_rates, dropouts, epochs=100, batch_size=256, seed=42):
+    """Train every head configuration on cached features; returns [(config, val_accuracy, val_loss, seconds, model)]."""
+    import tensorflow as tf
+
+    from architectures import build_head
+
+    (x_train, y_train), (x_test, y_test) = train, test
+    results = []
+    for head in heads:
+        for learning_rate in learning_rates:
+            for dropout in dropouts:
+                tf.keras.utils.set_random_seed(seed)
+                model = build_head(head, x_train.shape[1], dropout)
+                model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate),
+                              loss='binary_crossentropy', metrics=['accuracy'])
+                started = time.perf_counter()
+                model.fit(x_train, y_train, validation_data=(x_test, y_test), epochs=epochs,
+                          batch_size=batch_size, verbose=0, callbacks=[tf.keras.callbacks.EarlyStopping(
+                              monitor='val_loss', patience=5, restore_best_weights=True)])
+                elapsed = time.perf_counter() - started
+                loss, accuracy = model.evaluate(x_test, y_test, verbose=0)
+                config = {'head': head, 'learning_rate': learning_rate, 'dropout': dropout}
+                print(f"  {head:6s} lr={learning_rate:<7g} dropout={dropout:<4g} "
+                      f"val_accuracy {accuracy:.2%} · val_loss {loss:.4f} · {elapsed:.1f}s")
+                results.append((config, float(accuracy), float(loss), elapsed, model))
+    return results
+
+
+def main():
+    from architectures import BACKBONES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backbone", default='mobilenet_v2', choices=list(BACKBONES))
+    parser.add_argument("--weights", required=True, help="local backbone weights file (include_top=False)")
+    parser.add_argument("--processed-root", default='data/processed')
+    parser.add_argument("--array-root", default='data/raw/arrays')
+    parser.add_argument("--embedding-root", default=EMBEDDING_ROOT)
+    parser.add_argument("--heads", nargs='+', default=['linear', 'mlp'], choices=['linear', 'mlp'])
+    parser.add_argument("--learning-rates", nargs='+', type=float, default=[1e-3])
+    parser.add_argument("--dropouts", nargs='+', type=float, default=[0.2])
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64, help="backbone batch size while embedding")
+    parser.add_argument("--head-batch-size", type=int, default=256, help="batch size while training heads")
+    parser.add_argument("--workers", type=int, default=None, help="JPEG decode processes")
+    parser.add_argument("--output", default='models/dinosaur_classifier_transfer.keras')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        sys.exit(f"❌ Backbone weights not found at {args.weights}")
+
+    import tensorflow as tf
+
+    from architectures import build_backbone
+
+    print(f"🦖 Transfer learning on {args.backbone}...\n")
+    with open(os.path.join(args.processed_root, 'manifest.json')) as f:
+        manifest = json.load(f)
+    rows = manifest_rows(manifest)
+    class_names = sorted({label for _, label, _, _ in rows})
+
+    # Same weights file + input size → same embeddings
+    fingerprint = hashlib.sha256(f"{file_fingerprint(args.weights)}:{IMG_SIZE}".encode()).hexdigest()
+    store = EmbeddingStore(args.backbone, fingerprint, args.embedding_root)
+    backbone = build_backbone(args.backbone, args.weights, *IMG_SIZE)
+    embed_missing(store, backbone, rows, args.processed_root, args.array_root, args.batch_size,
+                  workers=args.workers)
+
+    data = {}
+    for split in ('train', 'test'):
+        in_split = [row for row in rows if row[3] == split]
+        data[split] = (store.get([sha256 for _, _, sha256, _ in in_split]),
+                       np.array([class_names.index(label) for _, label, _, _ in in_split], dtype=np.int32))
+    print(f"📐 {len(data['train'][1])} train / {len(data['test'][1])} test embeddings "
+          f"of size {data['train'][0].shape[1]}\n")
+
+    print("🧠 Training heads on cached embeddings...")
+    results = train_heads(data['train'], data['test'], args.heads, args.learning_rates, args.dropouts,
+                          args.epochs, args.head_batch_size)
+    config, accuracy, loss, _, head = max(results, key=lambda r: (r[1], -r[2]))
+    print(f"\n⭐ Best head: {config} · val_accuracy {accuracy:.2%}")
+
+    model = tf.keras.Model(backbone.input, head(backbone.output), name=f"{args.backbone}_dinosaur_classifier")
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    model.save(args.output)
+    print(f"✅ Saved {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB, "
+          f"{model.count_params():,} params, class order {class_names})")
+
+    report_path = os.path.splitext(args.output)[0] + '_report.json'
+    with open(report_path, 'w') as f:
+        json.dump({'config': vars(args), 'best': config, 'class_names': class_names, 'results': [
+            {**c, 'val_accuracy': a, 'val_loss': l, 'train_s': s} for c, a, l, s, _ in results
+        ]}, f, indent=2)
+    print(f"📁 Report saved to: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Fast parallel validation of image files, run before data prep and training.
+
+    python scripts/validate_images.py data/raw data/processed/train data/processed/test
+
+Every file is checked on a process pool for:
+  - zero-byte / unreadable files
+  - a bad header or broken structure (PIL verify)
+  - truncated data (decoded in JPEG draft mode, so even big photos are cheap)
+  - images that can't be converted to RGB
+  - extreme aspect ratios (longer side more than --max-aspect × the shorter)
+
+Verdicts are cached in data/validation_cache.json by path, size, mtime and
+content hash: unchanged files are not even opened on the next run, and
+touched files whose bytes didn't change are only re-hashed. Every failing
+file ends up in data/quarantine.json ({path: reason}) for people and other
+tools to inspect.
+
+data_prep.py, train_my_model.py and compare_architectures.py don't read
+that file back: they call validate_paths() on the files they are about
+to use and skip what it returns. Thanks to the cache that costs a stat per
+unchanged file, and it also covers files added since quarantine.json was
+last written (new raw files, fresh data_prep outputs), which a saved list
+can't.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, UnidentifiedImageError
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+CACHE_PATH = 'data/validation_cache.json'
+QUARANTINE_PATH = 'data/quarantine.json'
+MAX_ASPECT = 4.0
+
+
+def check_image(path, known_sha256=None, max_aspect=MAX_ASPECT):
+    """(sha256, problem or None, recheck) for one file (runs in a worker process).
+
+    recheck is False when the content hash equals known_sha256, i.e. the
+    cached verdict still applies and nothing was decoded.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return None, f"unreadable: {e}", True
+    if not data:
+        return None, "zero-byte file", True
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == known_sha256:
+        return sha256, None, False
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+    except UnidentifiedImageError:
+        return sha256, "not a recognised image format", True
+    except Exception as e:
+        return sha256, f"bad header or structure: {e}", True
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        if min(width, height) == 0 or max(width, height) / min(width, height) > max_aspect:
+            return sha256, f"extreme aspect ratio ({width}×{height})", True
+        try:
+            if img.format == 'JPEG':
+                img.draft('RGB', (max(1, width // 8), max(1, height // 8)))
+            img.load()
+        except Exception as e:
+            return sha256, f"truncated or undecodable: {e}", True
+        try:
+            img.convert('RGB')
+        except Exception as e:
+            return sha256, f"not convertible to RGB ({img.mode}): {e}", True
+    return sha256, None, True
+
+
+def iter_image_files(roots):
+    """Every image file under the given folders (sorted, recursive)."""
+    for root in roots:
+        for folder, subfolders, files in os.walk(root):
+            subfolders.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(folder, name)
+
+
+def load_cache(cache_path, max_aspect):
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+        if cache.get('max_aspect') == max_aspect:
+            return cache
+    return {'max_aspect': max_aspect, 'files': {}}
+
+
+def write_json(path, data):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def validate_paths(paths, cache_path=CACHE_PATH, quarantine_path=QUARANTINE_PATH,
+                   workers=None, max_aspect=MAX_ASPECT, chunksize=32):
+    """Validate paths (cached, in parallel); returns {path: problem} for the bad ones.
+
+    Also rewrites the quarantine list from every cached verdict whose file
+    still exists, so it covers everything ever validated, not just paths.
+    """
+    cache = load_cache(cache_path, max_aspect)
+    files = cache['files']
+    stats = {}
+    to_check = []
+    for path in paths:
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            files[key] = {'size': None, 'mtime_ns': None, 'sha256': None, 'problem': f"unreadable: {e}"}
+            continue
+        stats[key] = (stat.st_size, stat.st_mtime_ns)
+        cached = files.get(key)
+        if cached is None or (cached['size'], cached['mtime_ns']) != stats[key]:
+            to_check.append((path, key, cached['sha256'] if cached else None))
+
+    if to_check:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(check_image, [p for p, _, _ in to_check], [s for _, _, s in to_check],
+                               [max_aspect] * len(to_check), chunksize=chunksize)
+            for (path, key, _), (sha256, problem, recheck) in zip(to_check, results):
+                size, mtime_ns = stats[key]
+                if recheck:
+                    files[key] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256, 'problem': problem}
+                else:
+                    files[key].update(size=size, mtime_ns=mtime_ns)
+        elapsed = time.perf_counter() - started
+        print(f"🩺 Validated {len(to_check)} images ({len(to_check) / elapsed:.1f} img/s); "
+              f"{len(paths) - len(to_check)} unchanged since last check")
+
+    write_json(cache_path, cache)
+    quarantine = {key: verdict['problem'] for key, verdict in files.items()
+                  if verdict['problem'] and os.path.exists(key)}
+    write_json(quarantine_path, quarantine)
+    return {path: files[os.path.abspath(path)]['problem'] for path in paths
+            if files[os.path.abspath(path)]['problem']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folders", nargs='+')
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--max-aspect", type=float, default=MAX_ASPECT)
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--quarantine", default=QUARANTINE_PATH)
+    args = parser.parse_args()
+
+    paths = list(iter_image_files(args.folders))
+    print(f"🦖 Validating {len(paths)} images...")
+    bad = validate_paths(paths, args.cache, args.quarantine, args.workers, args.max_aspect)
+    for path, problem in bad.items():
+        print(f"❌ {path}: {problem}")
+    print(f"\n{'⚠️ ' if bad else '✅'} {len(bad)} of {len(paths)} images quarantined → {args.quarantine}")
+
+
+if __name__ == "__main__":
+    main()
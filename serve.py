@@ -0,0 +1,235 @@
+"""
+Micro-batching HTTP inference server for the dinosaur classifier.
+
+Uploads are decoded on the request threads, queued, and grouped into
+batches (up to --max-batch-size images or --max-wait-ms, whichever comes
+first) so the model runs one forward pass per batch instead of one per
+image.
+
+    python serve.py --port 8000 --max-batch-size 16 --max-wait-ms 5
+
+    POST /predict   body = raw image bytes   ->  {"score": 0.93}
+    GET  /health                             ->  {"status": "ok", "model_fingerprint": ..., ...}
+    GET  /metrics                            ->  Prometheus text (per-stage p50/p95/p99)
+
+Point the Streamlit app at it with DINO_INFERENCE_URL=http://host:port.
+"""
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference import (
+    BACKEND, DEFAULT_MODEL_PATHS, MODEL_PATH, load_engine, power_of_two_buckets,
+)
+from metrics import METRICS
+from prediction_cache import file_fingerprint
+from preprocessing import load_image_for_model
+
+
+class MicroBatcher:
+    """Collect single-image requests and run them through the model in batches."""
+
+    def __init__(self, engine, max_batch_size=16, max_wait_ms=5.0):
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self.batches_run = 0
+        self.images_scored = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, img_array):
+        """Queue one preprocessed (1, H, W, 3) array; returns a Future for its score."""
+        future = Future()
+        self._queue.put((img_array, future, time.perf_counter()))
+        return future
+
+    def predict(self, img_array, timeout=None):
+        return self.submit(img_array).result(timeout=timeout)
+
+    def close(self):
+        self._stopped.set()
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            arrays, futures, queued_at = zip(*batch)
+            started = time.perf_counter()
+            for t in queued_at:
+                METRICS.observe('queue_wait', started - t)
+            try:
+                with METRICS.stage('inference_batch'):
+                    scores = self.engine.classify(arrays)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.images_scored += len(futures)
+            METRICS.set_gauge('last_batch_size', len(futures))
+            for future, score in zip(futures, scores):
+                future.set_result(float(score))
+
+
+def make_handler(batcher, request_timeout=30.0, model_fingerprint=None):
+    class PredictHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = METRICS.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {
+                "status": "ok",
+                # Lets clients (e.g. the app's prediction cache) tell when the model changed
+                "model_fingerprint": model_fingerprint,
+                "batches_run": batcher.batches_run,
+                "images_scored": batcher.images_scored,
+            })
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            # The body can't be skipped without a valid length, so the connection is closed after these errors
+            header = self.headers.get("Content-Length")
+            if header is None:
+                self.close_connection = True
+                self._send_json(411, {"error": "Content-Length required"})
+                return
+            try:
+                length = int(header)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True
+                self._send_json(400, {"error": f"invalid Content-Length: {header!r}"})
+                return
+            if length == 0:
+                self._send_json(400, {"error": "empty body"})
+                return
+            try:
+                with METRICS.stage('upload'):
+                    body = self.rfile.read(length)
+                with METRICS.stage('decode'):
+                    img_array = load_image_for_model(io.BytesIO(body))
+            except Exception as e:
+                self._send_json(400, {"error": f"could not decode image: {e}"})
+                return
+            try:
+                with METRICS.stage('predict_wait'):
+                    score = batcher.predict(img_array, timeout=request_timeout)
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"score": score})
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictHandler
+
+
+def predict_remote(url, image_bytes, timeout=30.0):
+    """Send raw image bytes to a running server and return the dinosaur score."""
+    request = urllib.request.Request(
+        url.rstrip('/') + '/predict',
+        data=image_bytes,
+        headers={"Content-Type": "application/octet-stream"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return float(json.load(response)["score"])
+
+
+def remote_model_fingerprint(url, timeout=5.0):
+    """Fingerprint of the model a running server is serving (None if it doesn't report one)."""
+    with urllib.request.urlopen(url.rstrip('/') + '/health', timeout=timeout) as response:
+        return json.load(response).get("model_fingerprint")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-batching inference server for the dinosaur classifier")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--backend", default=BACKEND, choices=sorted(DEFAULT_MODEL_PATHS))
+    parser.add_argument("--model", default=None, help="defaults to DINO_MODEL_PATH or the backend's model file")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    if args.model is None:
+        args.model = MODEL_PATH if args.backend == BACKEND else DEFAULT_MODEL_PATHS[args.backend]
+
+    print(f"🔄 Loading {args.backend} model from {args.model}...")
+    load_started = time.perf_counter()
+    engine = load_engine(args.model, args.backend, power_of_two_buckets(args.max_batch_size))
+    model_fingerprint = file_fingerprint(args.model)
+    METRICS.set_gauge('model_load_seconds', time.perf_counter() - load_started)
+    batcher = MicroBatcher(engine, args.max_batch_size, args.max_wait_ms)
+    METRICS.register_collector(lambda: {
+        'batches_run_total': batcher.batches_run,
+        'images_scored_total': batcher.images_scored,
+    })
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher, model_fingerprint=model_fingerprint))
+    print(f"🦖 Serving on http://{args.host}:{args.port} "
+          f"(batch ≤ {args.max_batch_size}, wait ≤ {args.max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
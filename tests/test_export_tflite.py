@@ -0,0 +1,57 @@
+"""TFLite exports must compute the same scores as the Keras model they came from."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+tf = pytest.importorskip('tensorflow')
+
+from architectures import build_model  # noqa: E402
+from export_tflite import convert  # noqa: E402
+from inference import TFLiteEngine  # noqa: E402
+from preprocessing import IMG_SIZE  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def model():
+    tf.keras.utils.set_random_seed(0)
+    return build_model('gap', *IMG_SIZE, width=0.5)
+
+
+@pytest.fixture(scope='module')
+def batch():
+    return np.random.default_rng(0).uniform(0, 255, (3, *IMG_SIZE, 3)).astype(np.float32)
+
+
+def export(model, variant, tmp_path, train_dir=None):
+    path = tmp_path / f"model_{variant}.tflite"
+    path.write_bytes(convert(model, variant, train_dir, num_samples=8))
+    return TFLiteEngine(str(path), num_threads=1)
+
+
+def test_float32_matches_keras(model, batch, tmp_path):
+    expected = np.asarray(model(batch, training=False)).reshape(-1)
+    engine = export(model, 'float32', tmp_path)
+    np.testing.assert_allclose(engine.classify(batch), expected, atol=1e-5)
+    # Batch dimension stays dynamic
+    np.testing.assert_allclose(engine.classify(batch[:1]), expected[:1], atol=1e-5)
+
+
+def test_int8_calibrates_and_stays_close(model, batch, tmp_path):
+    from PIL import Image
+
+    train_dir = tmp_path / 'train'
+    for label in ('dinosaur', 'not_dinosaur'):
+        (train_dir / label).mkdir(parents=True)
+        for i in range(4):
+            Image.fromarray(batch[i % len(batch)].astype(np.uint8)).save(train_dir / label / f"{i}.png")
+
+    expected = np.asarray(model(batch, training=False)).reshape(-1)
+    scores = export(model, 'int8', tmp_path, str(train_dir)).classify(batch)
+    assert np.all(np.isfinite(scores))
+    np.testing.assert_allclose(scores, expected, atol=0.05)